@@ -49,6 +49,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "solver.profiling.ProfilingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -137,3 +138,80 @@ STATIC_URL = "static/"
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Solver settings
+
+# Number of processes used for batch solves (defaults to the CPU count)
+SOLVER_POOL_SIZE = None
+
+# Upper bounds for a single /scramble/ request (sequences are solved inline,
+# in the request's own thread)
+SCRAMBLE_MAX_COUNT = 10000
+SCRAMBLE_MAX_SEQUENCES = 200
+
+# Seconds between keep-alive comments on /history/stream/
+HISTORY_STREAM_KEEPALIVE = 15
+
+# Seconds between each server process's database checks for new solves for
+# /history/stream/ (solves saved by the same process are sent at once)
+HISTORY_STREAM_POLL_INTERVAL = 1.0
+
+# Seconds after which a /history/stream/ response ends; clients reconnect
+# and resume, so a stream never holds a server thread indefinitely
+HISTORY_STREAM_MAX_AGE = 300
+
+# Most recent missed solves replayed to a /history/stream/ resuming via
+# Last-Event-ID (older ones are on /history/)
+HISTORY_STREAM_MAX_BACKLOG = 100
+
+# Seconds /history/stream/ keeps waiting for a skipped solve id to commit
+# (solves can commit out of id order) before assuming it was rolled back
+HISTORY_STREAM_GAP_TIMEOUT = 30
+
+# Directory holding the pattern database files built by build_pattern_dbs
+PATTERN_DB_DIR = BASE_DIR / "pattern_dbs"
+
+# Search caps for mode="optimal" (requests may ask for less, never more)
+OPTIMAL_SOLVER_MAX_NODES = 5_000_000
+OPTIMAL_SOLVER_TIME_LIMIT = 30.0
+
+# Where /profiling/ saves cProfile and tracemalloc output, and the on/off
+# switch every worker process reads
+PROFILING_DIR = BASE_DIR / "profiles"
+
+# Functions and allocation sites listed in the /profiling/ summary
+PROFILING_TOP_N = 25
+
+# Most cubes accepted by a single POST /jobs/
+SOLVE_JOB_MAX_CUBES = 1000
+
+# Seconds a solve_worker may go without saving progress before its job is
+# retried; must exceed the slowest single solve (OPTIMAL_SOLVER_TIME_LIMIT)
+SOLVE_JOB_LEASE = 60.0
+
+# Seconds between progress saves while a job is running
+SOLVE_JOB_SAVE_INTERVAL = 2.0
+
+# Seconds an idle solve_worker waits before polling the queue again
+SOLVE_JOB_POLL_INTERVAL = 1.0
+
+# Claims of a job (including by workers that died) before it is marked failed
+SOLVE_JOB_MAX_ATTEMPTS = 3
+
+# Admin changelists count filtered results exactly only up to this many rows
+# (unfiltered tables larger than this use a cheap estimate)
+ADMIN_EXACT_COUNT_LIMIT = 100_000
+
+# Rows processed per transaction by admin bulk actions
+ADMIN_ACTION_CHUNK_SIZE = 1000
+
+# Memory-mapped file holding kociemba solutions shared by every process on
+# this host (None disables it); it is created on first use
+SOLUTION_CACHE_PATH = BASE_DIR / "solution_cache.bin"
+
+# Solutions the shared cache holds (64 bytes each); changing this resets it
+SOLUTION_CACHE_SLOTS = 1 << 18
+
+# Search caps for the F2L stage of mode="cfop"
+CFOP_MAX_NODES = 2_000_000
+CFOP_TIME_LIMIT = 10.0
@@ -26,4 +26,9 @@ urlpatterns = [
     path("validate/", views.ValidateCubeView.as_view(), name="validate_cube"),
     path("health/", views.health_check, name="health_check"),
     path("history/", views.solve_history, name="solve_history"),
+    path("history/stream/", views.history_stream, name="history_stream"),
+    path("scramble/", views.scramble, name="scramble"),
+    path("jobs/", views.create_job, name="create_job"),
+    path("jobs/<int:job_id>/", views.job_detail, name="job_detail"),
+    path("profiling/", views.profiling, name="profiling"),
 ]
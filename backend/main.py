@@ -1,5 +1,390 @@
+"""
+Prefork production server for the cube backend.
+
+    python main.py --bind 0.0.0.0:8000 --workers 4 --max-requests 1000
+
+The parent process sets up Django, loads kociemba's tables and the solver
+lookup tables, opens the listening socket and then forks the workers, so
+each worker starts instantly and shares those pages with the parent
+copy-on-write. Each worker runs the standard library's WSGI server with up
+to --threads requests in flight, one thread each. Long-lived
+/history/stream/ connections get threads of their own, up to --streams per
+worker, so open streams never keep other requests waiting. Workers give up
+on clients that send or read nothing for --timeout seconds, and are
+replaced after --max-requests requests (plus jitter, so they do not all
+restart together). Workers that crash are restarted with an increasing
+delay instead of in a tight loop.
+
+Signals to the parent:
+- TERM / INT: stop accepting requests, let workers finish the requests in
+  hand (up to --graceful-timeout seconds), then exit.
+- HUP: fork a fresh set of workers from the parent, then stop the old ones
+  gracefully, so requests are served throughout (code changes still need a
+  full restart).
+"""
+
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from socketserver import ThreadingMixIn
+from typing import Collection, Dict, List
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+# A worker exiting with an error is restarted after this delay, doubled for
+# each further crash in a row up to MAX_RESPAWN_DELAY
+RESPAWN_DELAY = 0.5
+MAX_RESPAWN_DELAY = 30.0
+
+
+def default_workers() -> int:
+    """One worker per core this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class InheritedSocketServer(ThreadingMixIn, WSGIServer):
+    """
+    Threaded WSGI server that accepts on a socket opened by the parent
+    process, handling at most ``threads`` requests at once, plus up to
+    ``streams`` requests for ``stream_paths``.
+    """
+
+    daemon_threads = True
+    block_on_close = False
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        application,
+        threads: int,
+        timeout: float,
+        streams: int = 0,
+        stream_paths: Collection[str] = (),
+    ):
+        super().__init__(
+            sock.getsockname()[:2], WSGIRequestHandler, bind_and_activate=False
+        )
+        self.socket.close()
+        self.socket = sock
+        self.server_name, self.server_port = sock.getsockname()[:2]
+        self.setup_environ()
+        self.set_app(application)
+        self.requests_handled = 0
+        self.threads = threads
+        self.request_timeout = timeout
+        # One permit per free thread; taken before accepting a connection
+        self.slots = threading.BoundedSemaphore(threads)
+        # Streams trade the permit they were accepted with for one of these
+        self.streams = streams
+        self.stream_slots = threading.BoundedSemaphore(streams)
+        self.stream_paths = frozenset(stream_paths)
+        self.local = threading.local()
+
+    def get_app(self):
+        return self.dispatch
+
+    def dispatch(self, environ, start_response):
+        # Streams stay open for minutes: they hand back their request permit
+        # so open streams never leave ordinary requests waiting
+        if environ.get("PATH_INFO") in self.stream_paths:
+            if not self.stream_slots.acquire(blocking=False):
+                start_response(
+                    "503 Service Unavailable", [("Content-Type", "application/json")]
+                )
+                return [b'{"error": "Too many open streams", "status": "error"}']
+            self.local.stream = True
+            self.slots.release()
+        return self.application(environ, start_response)
+
+    def process_request(self, request, client_address):
+        self.requests_handled += 1
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        self.local.stream = False
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            if self.local.stream:
+                self.stream_slots.release()
+            else:
+                self.slots.release()
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], TimeoutError):
+            print(f"Timed out waiting for {client_address[0]}", file=sys.stderr)
+            return
+        super().handle_error(request, client_address)
+
+    def get_request(self):
+        # Every worker polls the same listening socket, which is
+        # non-blocking so the workers that lose the race for a connection
+        # go back to waiting instead of blocking in accept().
+        conn, address = self.socket.accept()
+        # Clients that stall mid-request (or stop reading a response) time
+        # out instead of holding a thread forever
+        conn.settimeout(self.request_timeout)
+        return conn, address
+
+    def handle_next(self) -> None:
+        """Accept and start one request, if a thread is free for it."""
+        if not self.slots.acquire(timeout=self.timeout):
+            return
+        handled = self.requests_handled
+        self.handle_request()
+        if self.requests_handled == handled:
+            # Nothing was accepted, so no thread will release the permit
+            self.slots.release()
+
+    def drain(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for requests in progress to finish."""
+        deadline = time.monotonic() + timeout
+        for slots, count in (
+            (self.slots, self.threads),
+            (self.stream_slots, self.streams),
+        ):
+            for _ in range(count):
+                if not slots.acquire(timeout=max(deadline - time.monotonic(), 0)):
+                    return False
+        return True
+
+
+class Arbiter:
+    """Forks workers and keeps the configured number of them running."""
+
+    def __init__(self, sock, application, options, stream_paths=()):
+        self.sock = sock
+        self.application = application
+        self.options = options
+        self.stream_paths = stream_paths
+        self.workers: Dict[int, float] = {}
+        self.stopping = False
+        self.reload_pending = False
+        self.crashes = 0
+        self.respawn_at = 0.0
+
+    def log(self, message: str) -> None:
+        print(f"[{os.getpid()}] {message}", file=sys.stderr, flush=True)
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return
+        status = 0
+        try:
+            self.serve()
+        except BaseException:
+            traceback.print_exc()
+            status = 1
+        finally:
+            os._exit(status)
+
+    def serve(self) -> None:
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+        server = InheritedSocketServer(
+            self.sock,
+            self.application,
+            self.options.threads,
+            self.options.timeout,
+            self.options.streams,
+            self.stream_paths,
+        )
+        # Wake up regularly to notice a stop request between requests
+        server.timeout = 1.0
+        limit = self.options.max_requests
+        if limit:
+            limit += random.randint(0, self.options.max_requests_jitter)
+        while not stopping and not (limit and server.requests_handled >= limit):
+            server.handle_next()
+        if not stopping:
+            self.log(f"Worker recycled after {server.requests_handled} requests")
+        # Live history streams would otherwise hold up the drain
+        from solver.events import broadcaster
+
+        broadcaster.close()
+        if not server.drain(self.options.graceful_timeout):
+            self.log("Worker exiting with requests still in progress")
+
+    def kill_all(self, sig: int) -> None:
+        self.kill(list(self.workers), sig)
+
+    def kill(self, pids: List[int], sig: int) -> None:
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                self.workers.pop(pid, None)
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            self.workers.pop(pid, None)
+            code = os.waitstatus_to_exitcode(status)
+            if not code or self.stopping:
+                self.crashes = 0
+                continue
+            delay = min(RESPAWN_DELAY * 2**self.crashes, MAX_RESPAWN_DELAY)
+            self.crashes += 1
+            self.respawn_at = time.monotonic() + delay
+            self.log(
+                f"Worker {pid} exited with status {code}; respawning in {delay:.1f}s"
+            )
+
+    def run(self) -> None:
+        def stop(signum, frame):
+            self.stopping = True
+
+        def reload(signum, frame):
+            self.reload_pending = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGHUP, reload)
+
+        # Objects created so far are never freed; keeping the collector away
+        # from them keeps their pages shared with the workers.
+        gc.freeze()
+        self.log(
+            f"Serving on http://{self.options.bind} with "
+            f"{self.options.workers} worker(s)"
+        )
+        while not self.stopping:
+            self.reap()
+            if self.reload_pending:
+                self.reload_pending = False
+                self.log("Reloading workers")
+                # The new generation is accepting before the old one stops
+                old = list(self.workers)
+                for _ in range(self.options.workers):
+                    self.spawn()
+                self.kill(old, signal.SIGTERM)
+            while (
+                len(self.workers) < self.options.workers
+                and not self.stopping
+                and time.monotonic() >= self.respawn_at
+            ):
+                self.spawn()
+            time.sleep(0.2)
+
+        self.log("Shutting down")
+        self.kill_all(signal.SIGTERM)
+        deadline = time.monotonic() + self.options.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        self.kill_all(signal.SIGKILL)
+        self.reap()
+
+
+def listen(bind: str) -> socket.socket:
+    host, _, port = bind.rpartition(":")
+    sock = socket.create_server((host or "127.0.0.1", int(port)), backlog=1024)
+    sock.setblocking(False)
+    return sock
+
+
 def main():
-    print("Hello from cube!")
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--bind", default="127.0.0.1:8000", help="host:port to listen on"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="Worker processes (defaults to the number of usable cores)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=8,
+        help="Requests each worker handles at once",
+    )
+    parser.add_argument(
+        "--streams",
+        type=int,
+        default=100,
+        help="Open /history/stream/ connections each worker serves besides --threads",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=30.0,
+        help="Seconds a client may go without sending or reading before it is dropped",
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=1000,
+        help="Requests a worker serves before it is replaced (0 for no limit)",
+    )
+    parser.add_argument(
+        "--max-requests-jitter",
+        type=int,
+        default=100,
+        help="Random extra requests per worker, to stagger restarts",
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=float,
+        default=30.0,
+        help="Seconds workers get to finish their request on shutdown",
+    )
+    options = parser.parse_args()
+    if options.workers < 1:
+        parser.error("--workers must be positive")
+    if options.threads < 1:
+        parser.error("--threads must be positive")
+    if options.streams < 0:
+        parser.error("--streams must not be negative")
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cube.settings")
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connections
+    from django.urls import reverse
+
+    application = get_wsgi_application()
+
+    from solver.preload import preload
+
+    start = time.perf_counter()
+    loaded = preload()
+    print(
+        f"Preloaded {', '.join(loaded)} in {time.perf_counter() - start:.2f}s",
+        file=sys.stderr,
+    )
+    # Database connections must not be shared across fork; each worker
+    # opens its own on first use.
+    connections.close_all()
+
+    Arbiter(
+        listen(options.bind), application, options, [reverse("history_stream")]
+    ).run()
 
 
 if __name__ == "__main__":
@@ -1,3 +1,256 @@
-from django.contrib import admin
+from datetime import datetime
+from functools import cached_property
+from typing import Iterator, List, Optional
 
-# Register your models here.
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Max, Min, QuerySet
+from django.utils import timezone
+
+from .models import CubeSolve
+from .verify import find_mismatches
+
+
+def estimate_row_count(queryset) -> Optional[int]:
+    """
+    Cheap estimate of the number of rows in the queryset's table, or None
+    if the database backend offers none.
+    """
+    connection = connections[queryset.db]
+    table = connection.ops.quote_name(queryset.model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [table],
+            )
+        elif connection.vendor == "sqlite":
+            # Row ids only grow, so the largest one is the row count plus
+            # the number of deleted rows, read from the end of the index
+            cursor.execute(f"SELECT MAX(rowid) FROM {table}")
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row and row[0] and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for large, timestamp-ordered tables.
+
+    The unfiltered count comes from table statistics, and filtered counts
+    stop at ADMIN_EXACT_COUNT_LIMIT, so listing never counts every row.
+    Pages of the default newest-first listing are located by skipping
+    through the timestamp index alone and then fetching just that page's
+    rows, instead of materializing every skipped row and its join.
+    """
+
+    # Ties are broken by ascending pk, the order the timestamp index already
+    # keeps them in, so neither step needs a sort
+    SEEK_ORDERING = ("-timestamp", "pk")
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset)
+            if estimate is not None and estimate > limit:
+                return estimate
+        return queryset.order_by()[:limit].count()
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        queryset = self.object_list
+        if bottom and tuple(queryset.query.order_by) == self.SEEK_ORDERING:
+            boundary = list(
+                queryset.values_list("timestamp", "pk")[bottom : bottom + 1]
+            )
+            if not boundary:
+                return self._get_page(queryset.none(), number, self)
+            timestamp, pk = boundary[0]
+            # Written as a range plus exclusion (rather than an OR) so the
+            # database can seek straight to the boundary in the index
+            queryset = queryset.filter(timestamp__lte=timestamp).exclude(
+                timestamp=timestamp, pk__lt=pk
+            )
+            bottom = 0
+        # Counts may be estimates, so the last page is not cut short
+        return self._get_page(queryset[bottom : bottom + self.per_page], number, self)
+
+
+class TimestampSeekQuerySet(QuerySet):
+    """
+    Changelist queryset that answers the date hierarchy's queries from the
+    timestamp index.
+
+    The stock date hierarchy takes MIN and MAX of the timestamp in one query
+    and lists the distinct years, months or days with SELECT DISTINCT over a
+    truncated timestamp, both of which read every matching row. Here each
+    is a handful of index seeks instead: one per period found.
+    """
+
+    _TRUNCATE = {
+        "year": dict(month=1, day=1),
+        "month": dict(day=1),
+        "day": {},
+    }
+
+    def aggregate(self, *args, **kwargs):
+        if not args and kwargs == {
+            "first": Min("timestamp"),
+            "last": Max("timestamp"),
+        }:
+            timestamps = self.order_by("timestamp").values_list("timestamp", flat=True)
+            return {"first": timestamps.first(), "last": timestamps.last()}
+        return super().aggregate(*args, **kwargs)
+
+    def datetimes(self, field_name, kind, order="ASC", tzinfo=None, **kwargs):
+        if field_name != "timestamp" or kind not in self._TRUNCATE or kwargs:
+            return super().datetimes(field_name, kind, order, tzinfo, **kwargs)
+        tzinfo = tzinfo or timezone.get_current_timezone()
+        timestamps = self.order_by("timestamp").values_list("timestamp", flat=True)
+        periods: List[datetime] = []
+        moment = timestamps.first()
+        while moment is not None:
+            local = moment.astimezone(tzinfo)
+            start = datetime(local.year, local.month, local.day, tzinfo=tzinfo).replace(
+                **self._TRUNCATE[kind]
+            )
+            periods.append(start)
+            if kind == "year":
+                end = start.replace(year=start.year + 1)
+            elif kind == "month":
+                end = start.replace(
+                    year=start.year + start.month // 12, month=start.month % 12 + 1
+                )
+            else:
+                end = datetime.fromordinal(start.toordinal() + 1).replace(tzinfo=tzinfo)
+            moment = timestamps.filter(timestamp__gte=end).first()
+        return periods if order == "ASC" else periods[::-1]
+
+
+def _pk_chunks(queryset, size: int) -> Iterator[List[int]]:
+    """Yield the queryset's primary keys in ascending batches of ``size``."""
+    pks = queryset.order_by("pk").values_list("pk", flat=True)
+    last = None
+    while True:
+        chunk = list((pks if last is None else pks.filter(pk__gt=last))[:size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+
+class MoveCountFilter(admin.SimpleListFilter):
+    # Fixed ranges, so the filter never has to list the distinct move
+    # counts of the whole table
+    title = "move count"
+    parameter_name = "moves"
+    RANGES = {
+        "0-10": (0, 10),
+        "11-15": (11, 15),
+        "16-20": (16, 20),
+        "21+": (21, None),
+    }
+
+    def lookups(self, request, model_admin):
+        return [(key, key) for key in self.RANGES]
+
+    def queryset(self, request, queryset):
+        if self.value() not in self.RANGES:
+            return queryset
+        low, high = self.RANGES[self.value()]
+        queryset = queryset.filter(state__move_count__gte=low)
+        if high is not None:
+            queryset = queryset.filter(state__move_count__lte=high)
+        return queryset
+
+
+@admin.register(CubeSolve)
+class CubeSolveAdmin(admin.ModelAdmin):
+    list_display = (
+        "timestamp",
+        "facelet_string",
+        "move_count",
+        "mode",
+        "solve_time_ms",
+        "cached",
+        "ip_address",
+    )
+    list_select_related = ("state",)
+    list_filter = (MoveCountFilter, "state__mode", "cached")
+    date_hierarchy = "timestamp"
+    ordering = EstimatedCountPaginator.SEEK_ORDERING
+    search_fields = ("=ip_address",)
+    search_help_text = "Exact client IP address"
+    raw_id_fields = ("state",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 100
+    actions = ("delete_in_chunks", "verify_solutions")
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return TimestampSeekQuerySet(
+            self.model, query=queryset.query, using=queryset.db
+        )
+
+    @admin.display(ordering="state__facelet_string")
+    def facelet_string(self, obj: CubeSolve) -> str:
+        return obj.facelet_string
+
+    @admin.display(ordering="state__move_count")
+    def move_count(self, obj: CubeSolve) -> int:
+        return obj.move_count
+
+    @admin.display(ordering="state__mode")
+    def mode(self, obj: CubeSolve) -> str:
+        return obj.mode
+
+    def get_actions(self, request):
+        # The stock delete action loads every selected object to build its
+        # confirmation page
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+    @admin.action(
+        description="Delete selected cube solves (in chunks)",
+        permissions=["delete"],
+    )
+    def delete_in_chunks(self, request, queryset):
+        deleted = 0
+        for pks in _pk_chunks(queryset, settings.ADMIN_ACTION_CHUNK_SIZE):
+            with transaction.atomic():
+                deleted += CubeSolve.objects.filter(pk__in=pks).delete()[0]
+        self.message_user(
+            request, f"Deleted {deleted} cube solve(s).", messages.SUCCESS
+        )
+
+    @admin.action(description="Verify solutions of selected cube solves")
+    def verify_solutions(self, request, queryset):
+        checked = 0
+        mismatches = []
+        for pks in _pk_chunks(queryset, settings.ADMIN_ACTION_CHUNK_SIZE):
+            rows = CubeSolve.objects.filter(pk__in=pks).values_list(
+                "pk", "state__facelet_string", "state__solution"
+            )
+            checked += len(pks)
+            mismatches.extend(find_mismatches(rows))
+
+        if not mismatches:
+            self.message_user(
+                request, f"All {checked} solution(s) are correct.", messages.SUCCESS
+            )
+            return
+        shown = ", ".join(f"#{pk} ({reason})" for pk, reason in mismatches[:20])
+        more = f" and {len(mismatches) - 20} more" if len(mismatches) > 20 else ""
+        self.message_user(
+            request,
+            f"{len(mismatches)} of {checked} solution(s) are wrong: {shown}{more}",
+            messages.ERROR,
+        )
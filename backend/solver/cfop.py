@@ -0,0 +1,513 @@
+"""
+Step-by-step CFOP solutions: cross, F2L, OLL and PLL.
+
+The cross (the four D layer edges) is walked downhill through the edges_d
+pattern database, which holds its exact distance, so it is always optimal.
+Each F2L pair is found by IDA* over U, R, F, L and B turns, pruned with the
+cross distance and the F2L pattern databases (each pair together with one
+cross edge beside its slot); each search stops at the shortest sequence
+that solves any one more pair without disturbing the cross or the pairs
+already in place, and all of them share one node and time budget.
+
+The last layer is not searched at all. Every OLL and PLL algorithm below is
+expanded, once per process, into every case it solves when performed after
+any U turn (AUF) and from any side of the cube (y rotations), plus the final
+U turn for PLL. The resulting tables are keyed by the last layer's
+orientation (OLL) or permutation (PLL), so recognizing a case is a single
+dictionary lookup; together they cover all 216 orientations and 288
+permutations that can follow F2L.
+"""
+
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .cube import (
+    FACES,
+    MOVE_NAMES,
+    SOLVED_STATE,
+    CubieState,
+    apply_moves,
+    apply_moves_to_state,
+    facelets_to_state,
+    invert_moves,
+)
+from .optimal import SearchLimitExceeded
+from .pattern import (
+    CORNER_CODE_MOVES,
+    EDGE_CODE_MOVES,
+    F2L_PATTERN_DATABASES,
+    SOLVED_CORNER_CODES,
+    SOLVED_EDGE_CODES,
+    PatternDatabase,
+    get_pattern_database,
+    state_to_codes,
+)
+
+# Standard algorithms; wide turns, slices and rotations are expanded into
+# face turns by to_face_turns
+OLL_ALGORITHMS: Dict[str, str] = {
+    "OLL 1": "R U2 R2 F R F' U2 R' F R F'",
+    "OLL 2": "F R U R' U' F' f R U R' U' f'",
+    "OLL 3": "f R U R' U' f' U' F R U R' U' F'",
+    "OLL 4": "f R U R' U' f' U F R U R' U' F'",
+    "OLL 5": "r' U2 R U R' U r",
+    "OLL 6": "r U2 R' U' R U' r'",
+    "OLL 7": "r U R' U R U2 r'",
+    "OLL 8": "l' U' L U' L' U2 l",
+    "OLL 9": "R U R' U' R' F R2 U R' U' F'",
+    "OLL 10": "R U R' U R' F R F' R U2 R'",
+    "OLL 11": "r U R' U R' F R F' R U2 r'",
+    "OLL 12": "M' R' U' R U' R' U2 R U' R r'",
+    "OLL 13": "F U R U' R2 F' R U R U' R'",
+    "OLL 14": "R' F R U R' F' R F U' F'",
+    "OLL 15": "r' U' r R' U' R U r' U r",
+    "OLL 16": "r U r' R U R' U' r U' r'",
+    "OLL 17": "R U R' U R' F R F' U2 R' F R F'",
+    "OLL 18": "r U R' U R U2 r2 U' R U' R' U2 r",
+    "OLL 19": "r' R U R U R' U' M' R' F R F'",
+    "OLL 20": "r U R' U' M2 U R U' R' U' M'",
+    "OLL 21": "R U2 R' U' R U R' U' R U' R'",
+    "OLL 22": "R U2 R2 U' R2 U' R2 U2 R",
+    "OLL 23": "R2 D' R U2 R' D R U2 R",
+    "OLL 24": "r U R' U' r' F R F'",
+    "OLL 25": "F' r U R' U' r' F R",
+    "OLL 26": "R U2 R' U' R U' R'",
+    "OLL 27": "R U R' U R U2 R'",
+    "OLL 28": "r U R' U' M U R U' R'",
+    "OLL 29": "R U R' U' R U' R' F' U' F R U R'",
+    "OLL 30": "F R' F R2 U' R' U' R U R' F2",
+    "OLL 31": "R' U' F U R U' R' F' R",
+    "OLL 32": "L U F' U' L' U L F L'",
+    "OLL 33": "R U R' U' R' F R F'",
+    "OLL 34": "R U R2 U' R' F R U R U' F'",
+    "OLL 35": "R U2 R2 F R F' R U2 R'",
+    "OLL 36": "L' U' L U' L' U L U L F' L' F",
+    "OLL 37": "F R' F' R U R U' R'",
+    "OLL 38": "R U R' U R U' R' U' R' F R F'",
+    "OLL 39": "L F' L' U' L U F U' L'",
+    "OLL 40": "R' F R U R' U' F' U R",
+    "OLL 41": "R U R' U R U2 R' F R U R' U' F'",
+    "OLL 42": "R' U' R U' R' U2 R F R U R' U' F'",
+    "OLL 43": "F' U' L' U L F",
+    "OLL 44": "F U R U' R' F'",
+    "OLL 45": "F R U R' U' F'",
+    "OLL 46": "R' U' R' F R F' U R",
+    "OLL 47": "R' U' R' F R F' R' F R F' U R",
+    "OLL 48": "F R U R' U' R U R' U' F'",
+    "OLL 49": "r U' r2 U r2 U r2 U' r",
+    "OLL 50": "r' U r2 U' r2 U' r2 U r'",
+    "OLL 51": "F U R U' R' U R U' R' F'",
+    "OLL 52": "R U R' U R U' B U' B' R'",
+    "OLL 53": "l' U2 L U L' U' L U L' U l",
+    "OLL 54": "r U2 R' U' R U R' U' R U' r'",
+    "OLL 55": "R' F R U R U' R2 F' R2 U' R' U R U R'",
+    "OLL 56": "r' U' r U' R' U R U' R' U R r' U r",
+    "OLL 57": "R U R' U' M' U R U' r'",
+}
+
+PLL_ALGORITHMS: Dict[str, str] = {
+    "Aa": "x R' U R' D2 R U' R' D2 R2 x'",
+    "Ab": "x R2 D2 R U R' D2 R U' R x'",
+    "E": "x' R U' R' D R U R' D' R U R' D R U' R' D' x",
+    "F": "R' U' F' R U R' U' R' F R2 U' R' U' R U R' U R",
+    "Ga": "R2 U R' U R' U' R U' R2 U' D R' U R D'",
+    "Gb": "R' U' R U D' R2 U R' U R U' R U' R2 D",
+    "Gc": "R2 U' R U' R U R' U R2 U D' R U' R' D",
+    "Gd": "R U R' U' D R2 U' R U' R' U R' U R2 D'",
+    "H": "M2 U M2 U2 M2 U M2",
+    "Ja": "x R2 F R F' R U2 r' U r U2 x'",
+    "Jb": "R U R' F' R U R' U' R' F R2 U' R'",
+    "Na": "R U R' U R U R' F' R U R' U' R' F R2 U' R' U2 R U' R'",
+    "Nb": "R' U R U' R' F' U' F R U R' F R' F' R U' R",
+    "Ra": "R U' R' U' R U R D R' U' R D' R' U2 R'",
+    "Rb": "R2 F R U R U' R' F' R U2 R' U2 R",
+    "T": "R U R' U' R' F R2 U' R' U' R U R' F'",
+    "Ua": "M2 U M U2 M' U M2",
+    "Ub": "M2 U' M U2 M' U' M2",
+    "V": "R' U R' U' y R' F' R2 U' R' U R' F R F",
+    "Y": "F R U' R' U' R U R' F' R U R' U' R' F R F'",
+    "Z": "M' U M2 U M2 U M' U2 M2",
+}
+
+# F2L slots: name, D layer corner and middle layer edge
+F2L_PAIRS: Tuple[Tuple[str, int, int], ...] = (
+    ("FR", 4, 8),
+    ("FL", 5, 9),
+    ("BL", 6, 10),
+    ("BR", 7, 11),
+)
+
+# The pattern database holding exact distances for the four D layer edges
+CROSS_DATABASE = "edges_d"
+_CROSS_EDGES = (4, 5, 6, 7)
+
+_QUARTER_TURNS = {"": 1, "2": 2, "'": 3}
+_SUFFIXES = ("", "", "2", "'")
+
+# How each whole-cube rotation relabels the faces: after the rotation, the
+# face called key is the one previously called value
+_ROTATIONS: Dict[str, Dict[str, str]] = {
+    "x": {"U": "F", "F": "D", "D": "B", "B": "U"},
+    "y": {"F": "R", "R": "B", "B": "L", "L": "F"},
+    "z": {"R": "U", "U": "L", "L": "D", "D": "R"},
+}
+
+# Wide turns and slices as the outer face turns and rotation they equal
+_COMPOUND_MOVES: Dict[str, Tuple[str, str]] = {
+    "r": ("L", "x"),
+    "l": ("R", "x'"),
+    "u": ("D", "y"),
+    "d": ("U", "y'"),
+    "f": ("B", "z"),
+    "b": ("F", "z'"),
+    "M": ("R L'", "x'"),
+    "E": ("U D'", "y'"),
+    "S": ("F' B", "z"),
+}
+
+_AUF_MOVES: Tuple[Tuple[str, ...], ...] = ((), ("U",), ("U2",), ("U'",))
+_Y_ROTATIONS = ("", "y", "y2", "y'")
+
+
+class LastLayerCase(NamedTuple):
+    name: str
+    algorithm: str
+    # Side the algorithm is performed from, as a rotation before it
+    rotation: str
+    # The whole sequence in face turns, including any U turns around it
+    moves: Tuple[str, ...]
+
+
+CaseTable = Dict[Tuple[int, ...], LastLayerCase]
+
+
+def _merge_turns(turns: Sequence[Tuple[str, int]]) -> List[str]:
+    """Combine consecutive turns of one face and name them."""
+    merged: List[Tuple[str, int]] = []
+    for face, quarters in turns:
+        if merged and merged[-1][0] == face:
+            quarters = (merged.pop()[1] + quarters) % 4
+        if quarters:
+            merged.append((face, quarters))
+    return [face + _SUFFIXES[quarters] for face, quarters in merged]
+
+
+def to_face_turns(algorithm: str) -> List[str]:
+    """
+    Expand an algorithm written with wide turns, slices and rotations into
+    the equivalent face turns (with the centers fixed).
+
+    Raises ValueError for unknown notation.
+    """
+    faces = {face: face for face in FACES}
+    turns: List[Tuple[str, int]] = []
+
+    def rotate(axis: str, quarters: int) -> None:
+        nonlocal faces
+        for _ in range(quarters):
+            faces = {face: faces[_ROTATIONS[axis].get(face, face)] for face in faces}
+
+    for token in algorithm.split():
+        base, suffix = token[0], token[1:]
+        if suffix not in _QUARTER_TURNS:
+            raise ValueError(f"Unknown move: {token}")
+        quarters = _QUARTER_TURNS[suffix]
+        if base in faces:
+            turns.append((faces[base], quarters))
+        elif base in _ROTATIONS:
+            rotate(base, quarters)
+        elif base in _COMPOUND_MOVES:
+            outer, rotation = _COMPOUND_MOVES[base]
+            for move in outer.split():
+                turns.append((faces[move[0]], quarters * _QUARTER_TURNS[move[1:]] % 4))
+            rotate(rotation[0], quarters * _QUARTER_TURNS[rotation[1:]] % 4)
+        else:
+            raise ValueError(f"Unknown move: {token}")
+    return _merge_turns(turns)
+
+
+def _rotate_y(moves: Sequence[str], quarters: int) -> List[str]:
+    """Relabel face turns as if performed after ``quarters`` y rotations."""
+    faces = {face: face for face in FACES}
+    for _ in range(quarters):
+        faces = {face: faces[_ROTATIONS["y"].get(face, face)] for face in faces}
+    return [faces[move[0]] + move[1:] for move in moves]
+
+
+def _concatenate(*sequences: Sequence[str]) -> List[str]:
+    return _merge_turns(
+        [(move[0], _QUARTER_TURNS[move[1:]]) for moves in sequences for move in moves]
+    )
+
+
+def orientation_key(state: CubieState) -> Tuple[int, ...]:
+    """Twist of the four U layer corners and flip of the four U layer edges."""
+    return state[1][:4] + state[3][:4]
+
+
+def permutation_key(state: CubieState) -> Tuple[int, ...]:
+    """Which pieces occupy the four U layer corner and edge positions."""
+    return state[0][:4] + state[2][:4]
+
+
+def _preserves_first_two_layers(element: CubieState, oriented: bool) -> bool:
+    cp, co, ep, eo = element
+    if cp[4:] != SOLVED_STATE[0][4:] or ep[4:] != SOLVED_STATE[2][4:]:
+        return False
+    if any(co[4:]) or any(eo[4:]):
+        return False
+    return not oriented or not (any(co) or any(eo))
+
+
+def _build_case_table(
+    algorithms: Dict[str, str],
+    key: Callable[[CubieState], Tuple[int, ...]],
+    post_aufs: Sequence[Tuple[str, ...]],
+    oriented: bool,
+) -> CaseTable:
+    """
+    Index every case the algorithms solve, from any side and after any U
+    turn, keeping the shortest sequence for each. ``oriented`` algorithms
+    must also leave the last layer's orientation alone.
+    """
+    table: CaseTable = {}
+    for name, algorithm in {"skip": "", **algorithms}.items():
+        base = to_face_turns(algorithm)
+        element = apply_moves_to_state(SOLVED_STATE, base)
+        if not _preserves_first_two_layers(element, oriented):
+            raise ValueError(f"{name} ({algorithm}) disturbs the first two layers")
+        for quarters, rotation in enumerate(_Y_ROTATIONS):
+            rotated = _rotate_y(base, quarters)
+            for pre in _AUF_MOVES:
+                for post in post_aufs:
+                    moves = _concatenate(pre, rotated, post)
+                    case = apply_moves_to_state(SOLVED_STATE, invert_moves(moves))
+                    existing = table.get(key(case))
+                    if existing is None or len(moves) < len(existing.moves):
+                        table[key(case)] = LastLayerCase(
+                            name, algorithm, rotation, tuple(moves)
+                        )
+    return table
+
+
+_oll_table: Optional[CaseTable] = None
+_pll_table: Optional[CaseTable] = None
+
+
+def get_case_tables() -> Tuple[CaseTable, CaseTable]:
+    """Return the OLL and PLL case tables, building them on first use."""
+    global _oll_table, _pll_table
+    if _oll_table is None or _pll_table is None:
+        _oll_table = _build_case_table(
+            OLL_ALGORITHMS, orientation_key, [()], oriented=False
+        )
+        _pll_table = _build_case_table(
+            PLL_ALGORITHMS, permutation_key, _AUF_MOVES, oriented=True
+        )
+    return _oll_table, _pll_table
+
+
+def _pair_databases() -> List[List[Tuple[PatternDatabase, int]]]:
+    """
+    For each F2L pair, its databases and the position in the search codes
+    of the cross edge each one also covers.
+    """
+    databases: List[List[Tuple[PatternDatabase, int]]] = [[] for _ in F2L_PAIRS]
+    for name, (corners, edges) in F2L_PATTERN_DATABASES.items():
+        pair = [corner for _, corner, _ in F2L_PAIRS].index(corners[0])
+        databases[pair].append(
+            (get_pattern_database(name), _CROSS_EDGES.index(edges[1]))
+        )
+    return databases
+
+
+def _pair_solved(codes: Tuple[int, ...], pair: int) -> bool:
+    _, corner, edge = F2L_PAIRS[pair]
+    return (
+        codes[4 + 2 * pair] == SOLVED_CORNER_CODES[corner]
+        and codes[5 + 2 * pair] == SOLVED_EDGE_CODES[edge]
+    )
+
+
+# F2L keeps the cross in place, so it never turns the D layer
+_F2L_MOVES = [
+    (move, FACES.index(name[0]), CORNER_CODE_MOVES[move], EDGE_CODE_MOVES[move])
+    for move, name in enumerate(MOVE_NAMES)
+    if name[0] != "D"
+]
+
+
+def _solve_cross(
+    corner_codes: List[int], edge_codes: List[int]
+) -> Tuple[List[str], List[int], List[int]]:
+    """Walk downhill through the cross distances; returns an optimal cross."""
+    database = get_pattern_database(CROSS_DATABASE)
+    moves: List[str] = []
+    distance = database.lookup(corner_codes, edge_codes)
+    while distance:
+        for move, name in enumerate(MOVE_NAMES):
+            moved = [EDGE_CODE_MOVES[move][code] for code in edge_codes]
+            if database.lookup(corner_codes, moved) < distance:
+                corner_codes = [CORNER_CODE_MOVES[move][c] for c in corner_codes]
+                edge_codes = moved
+                distance -= 1
+                moves.append(name)
+                break
+        else:
+            raise ValueError(f"Corrupt {CROSS_DATABASE} pattern database")
+    return moves, corner_codes, edge_codes
+
+
+def _solve_next_pair(
+    codes: Tuple[int, ...],
+    solved: List[int],
+    nodes_left: int,
+    deadline: Optional[float],
+) -> Tuple[List[str], Tuple[int, ...], int]:
+    """
+    IDA* for the shortest sequence that solves one more F2L pair, keeping
+    the cross and the ``solved`` pairs in place.
+
+    ``codes`` holds the four cross edges, then each pair's corner and edge.
+    Returns the moves, the codes after them and the nodes left.
+    """
+    cross = get_pattern_database(CROSS_DATABASE)
+    pair_databases = _pair_databases()
+    unsolved = [p for p in range(len(F2L_PAIRS)) if p not in solved]
+
+    def pair_distance(k: Tuple[int, ...], pair: int) -> int:
+        (first, x), (second, y) = pair_databases[pair]
+        index = (k[4 + 2 * pair] * 24 + k[5 + 2 * pair]) * 24
+        return max(first.distance(index + k[x]), second.distance(index + k[y]))
+
+    def heuristic(k: Tuple[int, ...]) -> int:
+        # The cross and solved pairs must all be home, and at least one
+        # unsolved pair must get there
+        h = cross.distance(((k[0] * 24 + k[1]) * 24 + k[2]) * 24 + k[3])
+        for p in solved:
+            h = max(h, pair_distance(k, p))
+        return max(h, min(pair_distance(k, p) for p in unsolved))
+
+    path: List[int] = []
+
+    def search(k: Tuple[int, ...], depth: int, bound: int, last_face: int) -> int:
+        nonlocal nodes_left
+        nodes_left -= 1
+        if nodes_left < 0:
+            raise SearchLimitExceeded("F2L node limit reached")
+        if deadline is not None and nodes_left & 0xFFF == 0:
+            if time.monotonic() > deadline:
+                raise SearchLimitExceeded("F2L time limit reached")
+
+        h = heuristic(k)
+        if h == 0:
+            return -1
+        if depth + h > bound:
+            return depth + h
+
+        smallest = 1 << 30
+        for move, face, ct, et in _F2L_MOVES:
+            # Same pruning of redundant face orders as the optimal solver
+            if face == last_face or face == last_face - 3:
+                continue
+            path.append(move)
+            result = search(
+                (
+                    et[k[0]], et[k[1]], et[k[2]], et[k[3]],
+                    ct[k[4]], et[k[5]], ct[k[6]], et[k[7]],
+                    ct[k[8]], et[k[9]], ct[k[10]], et[k[11]],
+                ),
+                depth + 1,
+                bound,
+                face,
+            )  # fmt: skip
+            if result < 0:
+                return result
+            path.pop()
+            smallest = min(smallest, result)
+        return smallest
+
+    bound = heuristic(codes)
+    while True:
+        result = search(codes, 0, bound, -1)
+        if result < 0:
+            break
+        bound = result
+
+    for move in path:
+        ct, et = CORNER_CODE_MOVES[move], EDGE_CODE_MOVES[move]
+        codes = tuple(
+            (ct if i >= 4 and i % 2 == 0 else et)[code] for i, code in enumerate(codes)
+        )
+    return [MOVE_NAMES[move] for move in path], codes, nodes_left
+
+
+def solve_cfop(
+    facelet_string: str, max_nodes: int, time_limit: Optional[float] = None
+) -> List[Dict[str, object]]:
+    """
+    Solve ``facelet_string`` stage by stage, the way CFOP is taught.
+
+    Returns the stages in order, each with its moves and the facelet string
+    after them: the cross, one stage per F2L search (with the slots it
+    filled), then OLL and PLL (with the case, its algorithm and the
+    rotation it is performed from).
+
+    Raises ValueError for invalid states, SearchLimitExceeded when the F2L
+    searches need more than ``max_nodes`` nodes or ``time_limit`` seconds,
+    and PatternDatabaseMissing if the cross (edges_d) or F2L pattern databases
+    have not been built.
+    """
+    state = facelets_to_state(facelet_string)
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    stages: List[Dict[str, object]] = []
+
+    def add_stage(stage: str, moves: Sequence[str], **details: object) -> None:
+        nonlocal facelet_string, state
+        facelet_string = apply_moves(facelet_string, moves)
+        state = apply_moves_to_state(state, moves)
+        stages.append(
+            {
+                "stage": stage,
+                **details,
+                "moves": list(moves),
+                "facelet_string": facelet_string,
+            }
+        )
+
+    corner_codes, edge_codes = state_to_codes(state)
+    moves, corner_codes, edge_codes = _solve_cross(corner_codes, edge_codes)
+    add_stage("cross", moves)
+
+    codes = tuple(edge_codes[e] for e in _CROSS_EDGES) + tuple(
+        code
+        for _, corner, edge in F2L_PAIRS
+        for code in (corner_codes[corner], edge_codes[edge])
+    )
+    solved: List[int] = []
+    nodes_left = max_nodes
+    while len(solved) < len(F2L_PAIRS):
+        moves, codes, nodes_left = _solve_next_pair(codes, solved, nodes_left, deadline)
+        # One search can finish more than one pair
+        filled = [
+            p
+            for p in range(len(F2L_PAIRS))
+            if p not in solved and _pair_solved(codes, p)
+        ]
+        solved.extend(filled)
+        add_stage("f2l", moves, slots=[F2L_PAIRS[p][0] for p in filled])
+
+    oll_table, pll_table = get_case_tables()
+    for stage, table, key in (
+        ("oll", oll_table, orientation_key),
+        ("pll", pll_table, permutation_key),
+    ):
+        case = table[key(state)]
+        add_stage(
+            stage,
+            case.moves,
+            case=case.name,
+            algorithm=case.algorithm,
+            rotation=case.rotation,
+        )
+    return stages
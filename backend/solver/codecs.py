@@ -0,0 +1,112 @@
+"""
+Request and response codecs for the solver endpoints.
+
+JSON goes through orjson when it is installed and the standard library
+otherwise. Clients that send ``Content-Type: application/msgpack`` or
+``Accept: application/msgpack`` get MessagePack instead, when msgpack is
+installed. Both packages are optional; without them the API behaves exactly
+as before, except that MessagePack bodies get 415 and clients that accept
+nothing but MessagePack get 406.
+"""
+
+import json
+from functools import wraps
+from typing import Any, Callable
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+
+class DecodeError(ValueError):
+    """Raised when a request body cannot be decoded."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        # 400 for a malformed body, 415 for a media type we cannot read
+        self.status = status
+
+
+def decode_request(request: HttpRequest) -> Any:
+    """Decode a JSON or MessagePack request body, based on its content type."""
+    if request.content_type in MSGPACK_TYPES:
+        if msgpack is None:
+            raise DecodeError(
+                "MessagePack request bodies are not supported", status=415
+            )
+        try:
+            return msgpack.unpackb(request.body)
+        except Exception as e:
+            raise DecodeError("Invalid MessagePack in request body") from e
+    try:
+        if orjson is not None:
+            return orjson.loads(request.body)
+        return json.loads(request.body)
+    except ValueError as e:
+        raise DecodeError("Invalid JSON in request body") from e
+
+
+def response_type(request: HttpRequest) -> str:
+    """Pick the response media type from the Accept header."""
+    # Most clients never mention msgpack; skip full Accept parsing for them
+    if msgpack is None or "msgpack" not in request.headers.get("Accept", ""):
+        return JSON
+    return request.get_preferred_type((JSON,) + MSGPACK_TYPES) or JSON
+
+
+def is_acceptable(request: HttpRequest) -> bool:
+    """False when the client only accepts MessagePack and it is not installed."""
+    if msgpack is not None or "msgpack" not in request.headers.get("Accept", ""):
+        return True
+    return request.get_preferred_type((JSON,)) is not None
+
+
+def require_acceptable(view: Callable) -> Callable:
+    """Answer 406 before running ``view`` if no response type would do."""
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if not is_acceptable(request):
+            response = HttpResponse(
+                json.dumps(
+                    {
+                        "error": "MessagePack responses are not supported",
+                        "status": "error",
+                    }
+                ),
+                content_type=JSON,
+                status=406,
+            )
+            patch_vary_headers(response, ("Accept",))
+            return response
+        return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def encode_response(request: HttpRequest, data: Any, status: int = 200) -> HttpResponse:
+    """Encode ``data`` in the format the client asked for."""
+    content_type = response_type(request)
+    if content_type in MSGPACK_TYPES:
+        content = msgpack.packb(data)
+    elif orjson is not None:
+        content = orjson.dumps(data)
+    else:
+        content = json.dumps(data, cls=DjangoJSONEncoder)
+    response = HttpResponse(content, content_type=content_type, status=status)
+    patch_vary_headers(response, ("Accept",))
+    return response
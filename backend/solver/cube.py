@@ -0,0 +1,298 @@
+"""
+Cubie-level model of the 3x3 cube.
+
+The constants follow the conventions of the kociemba package so that states
+produced here can be fed straight into ``kociemba.solve``:
+
+Facelet indices: U(0-8), R(9-17), F(18-26), D(27-35), L(36-44), B(45-53)
+Corner order: URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB
+Edge order: UR, UF, UL, UB, DR, DF, DL, DB, FR, FL, BL, BR
+
+A state is a tuple ``(cp, co, ep, eo)`` of corner permutation, corner
+orientation, edge permutation and edge orientation.
+"""
+
+import random
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CubieState = Tuple[Tuple[int, ...], Tuple[int, ...], Tuple[int, ...], Tuple[int, ...]]
+
+SOLVED_FACELETS: str = "UUUUUUUUURRRRRRRRRFFFFFFFFFDDDDDDDDDLLLLLLLLLBBBBBBBBB"
+
+FACES: str = "URFDLB"
+
+# Facelet positions of each corner / edge slot, starting with the U or D sticker
+CORNER_FACELETS: Tuple[Tuple[int, int, int], ...] = (
+    (8, 9, 20),  # URF
+    (6, 18, 38),  # UFL
+    (0, 36, 47),  # ULB
+    (2, 45, 11),  # UBR
+    (29, 26, 15),  # DFR
+    (27, 44, 24),  # DLF
+    (33, 53, 42),  # DBL
+    (35, 17, 51),  # DRB
+)
+
+EDGE_FACELETS: Tuple[Tuple[int, int], ...] = (
+    (5, 10),  # UR
+    (7, 19),  # UF
+    (3, 37),  # UL
+    (1, 46),  # UB
+    (32, 16),  # DR
+    (28, 25),  # DF
+    (30, 43),  # DL
+    (34, 52),  # DB
+    (23, 12),  # FR
+    (21, 41),  # FL
+    (50, 39),  # BL
+    (48, 14),  # BR
+)
+
+CORNER_COLORS: Tuple[str, ...] = tuple(
+    "".join(SOLVED_FACELETS[i] for i in corner) for corner in CORNER_FACELETS
+)
+EDGE_COLORS: Tuple[str, ...] = tuple(
+    "".join(SOLVED_FACELETS[i] for i in edge) for edge in EDGE_FACELETS
+)
+
+SOLVED_STATE: CubieState = (
+    tuple(range(8)),
+    (0,) * 8,
+    tuple(range(12)),
+    (0,) * 12,
+)
+
+# Clockwise quarter turns of each face in cubie form
+_BASIC_MOVES: Dict[str, CubieState] = {
+    "U": (
+        (3, 0, 1, 2, 4, 5, 6, 7),
+        (0, 0, 0, 0, 0, 0, 0, 0),
+        (3, 0, 1, 2, 4, 5, 6, 7, 8, 9, 10, 11),
+        (0,) * 12,
+    ),
+    "R": (
+        (4, 1, 2, 0, 7, 5, 6, 3),
+        (2, 0, 0, 1, 1, 0, 0, 2),
+        (8, 1, 2, 3, 11, 5, 6, 7, 4, 9, 10, 0),
+        (0,) * 12,
+    ),
+    "F": (
+        (1, 5, 2, 3, 0, 4, 6, 7),
+        (1, 2, 0, 0, 2, 1, 0, 0),
+        (0, 9, 2, 3, 4, 8, 6, 7, 1, 5, 10, 11),
+        (0, 1, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0),
+    ),
+    "D": (
+        (0, 1, 2, 3, 5, 6, 7, 4),
+        (0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 1, 2, 3, 5, 6, 7, 4, 8, 9, 10, 11),
+        (0,) * 12,
+    ),
+    "L": (
+        (0, 2, 6, 3, 4, 1, 5, 7),
+        (0, 1, 2, 0, 0, 2, 1, 0),
+        (0, 1, 10, 3, 4, 5, 9, 7, 8, 2, 6, 11),
+        (0,) * 12,
+    ),
+    "B": (
+        (0, 1, 3, 7, 4, 5, 2, 6),
+        (0, 0, 1, 2, 0, 0, 2, 1),
+        (0, 1, 2, 11, 4, 5, 6, 10, 8, 9, 3, 7),
+        (0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 1, 1),
+    ),
+}
+
+
+def multiply(a: CubieState, b: CubieState) -> CubieState:
+    """Return the state reached by applying ``b`` to ``a``."""
+    a_cp, a_co, a_ep, a_eo = a
+    b_cp, b_co, b_ep, b_eo = b
+    return (
+        tuple(a_cp[p] for p in b_cp),
+        tuple((a_co[p] + o) % 3 for p, o in zip(b_cp, b_co)),
+        tuple(a_ep[p] for p in b_ep),
+        tuple((a_eo[p] + o) % 2 for p, o in zip(b_ep, b_eo)),
+    )
+
+
+def _build_moves() -> Dict[str, CubieState]:
+    moves: Dict[str, CubieState] = {}
+    for face, quarter in _BASIC_MOVES.items():
+        half = multiply(quarter, quarter)
+        moves[face] = quarter
+        moves[face + "2"] = half
+        moves[face + "'"] = multiply(half, quarter)
+    return moves
+
+
+# All 18 face turns in standard notation, e.g. "R", "R2", "R'"
+MOVES: Dict[str, CubieState] = _build_moves()
+MOVE_NAMES: Tuple[str, ...] = tuple(MOVES)
+
+
+def _facelet_permutation(move: CubieState) -> Tuple[int, ...]:
+    # new_facelets[k] == old_facelets[perm[k]] for every state
+    cp, co, ep, eo = move
+    perm = list(range(54))
+    for i in range(8):
+        for n in range(3):
+            perm[CORNER_FACELETS[i][(n + co[i]) % 3]] = CORNER_FACELETS[cp[i]][n]
+    for i in range(12):
+        for n in range(2):
+            perm[EDGE_FACELETS[i][(n + eo[i]) % 2]] = EDGE_FACELETS[ep[i]][n]
+    return tuple(perm)
+
+
+# Facelet permutation of each move, usable on any 54-character state
+FACELET_MOVES: Dict[str, Tuple[int, ...]] = {
+    name: _facelet_permutation(move) for name, move in MOVES.items()
+}
+_FACELET_GETTERS = {name: itemgetter(*perm) for name, perm in FACELET_MOVES.items()}
+
+
+def apply_moves(facelet_string: str, moves: Iterable[str]) -> str:
+    """
+    Apply a sequence of face turns directly to a facelet string.
+
+    Raises KeyError for moves outside standard face-turn notation.
+    """
+    state = facelet_string
+    for move in moves:
+        state = _FACELET_GETTERS[move](state)
+    return "".join(state)
+
+
+def invert_moves(moves: Iterable[str]) -> List[str]:
+    """Return the sequence that undoes ``moves``."""
+    inverted: List[str] = []
+    for move in reversed(list(moves)):
+        if move.endswith("'"):
+            inverted.append(move[0])
+        elif move.endswith("2"):
+            inverted.append(move)
+        else:
+            inverted.append(move + "'")
+    return inverted
+
+
+def apply_moves_to_state(state: CubieState, moves: Iterable[str]) -> CubieState:
+    """Apply a sequence of face turns to a cubie state."""
+    for move in moves:
+        state = multiply(state, MOVES[move])
+    return state
+
+
+def state_to_facelets(state: CubieState) -> str:
+    """Convert a cubie state to a 54-character kociemba facelet string."""
+    cp, co, ep, eo = state
+    facelets = list(SOLVED_FACELETS)
+    for i in range(8):
+        colors = CORNER_COLORS[cp[i]]
+        slot = CORNER_FACELETS[i]
+        ori = co[i]
+        for n in range(3):
+            facelets[slot[(n + ori) % 3]] = colors[n]
+    for i in range(12):
+        colors = EDGE_COLORS[ep[i]]
+        slot = EDGE_FACELETS[i]
+        ori = eo[i]
+        for n in range(2):
+            facelets[slot[(n + ori) % 2]] = colors[n]
+    return "".join(facelets)
+
+
+def facelets_to_state(facelet_string: str) -> CubieState:
+    """
+    Convert a 54-character facelet string to a cubie state.
+
+    Raises ValueError if the string does not describe a solvable cube.
+    """
+    if len(facelet_string) != 54:
+        raise ValueError("Facelet string must have 54 characters")
+    if any(facelet_string[4 + 9 * i] != face for i, face in enumerate(FACES)):
+        raise ValueError("Center facelets must be in URFDLB order")
+
+    cp: List[int] = []
+    co: List[int] = []
+    for slot in CORNER_FACELETS:
+        for ori in range(3):
+            if facelet_string[slot[ori]] in "UD":
+                break
+        else:
+            raise ValueError("Corner without a U or D sticker")
+        colors = "".join(facelet_string[slot[(ori + n) % 3]] for n in range(3))
+        if colors not in CORNER_COLORS:
+            raise ValueError(f"Invalid corner colors: {colors}")
+        cp.append(CORNER_COLORS.index(colors))
+        co.append(ori)
+
+    ep: List[int] = []
+    eo: List[int] = []
+    for slot in EDGE_FACELETS:
+        colors = facelet_string[slot[0]] + facelet_string[slot[1]]
+        if colors in EDGE_COLORS:
+            ep.append(EDGE_COLORS.index(colors))
+            eo.append(0)
+        elif colors[::-1] in EDGE_COLORS:
+            ep.append(EDGE_COLORS.index(colors[::-1]))
+            eo.append(1)
+        else:
+            raise ValueError(f"Invalid edge colors: {colors}")
+
+    if len(set(cp)) != 8 or len(set(ep)) != 12:
+        raise ValueError("Some pieces appear more than once")
+    if sum(co) % 3 or sum(eo) % 2:
+        raise ValueError("Twisted corner or flipped edge")
+    if _permutation_parity(cp) != _permutation_parity(ep):
+        raise ValueError("Corner and edge permutation parities differ")
+
+    return tuple(cp), tuple(co), tuple(ep), tuple(eo)
+
+
+def _permutation_parity(perm: List[int]) -> int:
+    parity = 0
+    seen = [False] * len(perm)
+    for start in range(len(perm)):
+        if seen[start]:
+            continue
+        length = 0
+        i = start
+        while not seen[i]:
+            seen[i] = True
+            i = perm[i]
+            length += 1
+        parity ^= (length - 1) & 1
+    return parity
+
+
+def random_state(rng: Optional[random.Random] = None) -> CubieState:
+    """
+    Sample a uniformly random solvable cube state.
+
+    Permutations are drawn independently and the edge permutation parity is
+    fixed to match the corners by swapping two edges, which keeps the
+    distribution uniform. The last corner twist and edge flip are implied by
+    the others.
+    """
+    rng = rng or random.Random()
+
+    cp = list(range(8))
+    rng.shuffle(cp)
+    ep = list(range(12))
+    rng.shuffle(ep)
+    if _permutation_parity(cp) != _permutation_parity(ep):
+        ep[0], ep[1] = ep[1], ep[0]
+
+    co = [rng.randrange(3) for _ in range(7)]
+    co.append(-sum(co) % 3)
+    eo = [rng.randrange(2) for _ in range(11)]
+    eo.append(sum(eo) % 2)
+
+    return tuple(cp), tuple(co), tuple(ep), tuple(eo)
+
+
+def random_states(count: int, seed: Optional[int] = None) -> List[CubieState]:
+    """Sample ``count`` independent uniformly random states."""
+    rng = random.Random(seed)
+    return [random_state(rng) for _ in range(count)]
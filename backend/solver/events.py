@@ -0,0 +1,243 @@
+"""
+Live feed of newly saved solves for /history/stream/.
+
+Each server process runs one reader thread, started by the first stream.
+It reads solves newer than its cursor with an indexed ``pk`` range query
+and pushes each one, serialized once, onto every open stream's queue. Open
+streams cost one query per poll or wake-up between them, not one each, and
+they never touch the database themselves.
+
+Solves can commit out of pk order (two requests insert rows 8 and 9, and 9
+commits first), so the SolveFeed remembers the ids it skipped over and keeps
+asking for them for a while, instead of losing any solve that commits after
+a higher one. Reading from the database also lets every server process
+(main.py runs several) see solves saved by the others: the reader polls
+every HISTORY_STREAM_POLL_INTERVAL, and is woken at once for solves
+committed in its own process.
+"""
+
+import json
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+
+from .models import CubeSolve
+
+# Skipped ids waited for after each jump of the cursor; larger gaps come from
+# deleted rows rather than transactions still in flight
+MAX_TRACKED_GAP = 100
+
+# Events a stream may fall behind by before it is ended (the client then
+# reconnects and resumes from its Last-Event-ID)
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# (event id, JSON payload)
+Event = Tuple[int, str]
+
+
+class SolveFeed:
+    """Reads the solves that have not been sent yet, in pk order."""
+
+    def __init__(self, after_id: int, gap_timeout: float):
+        self.last_id = after_id
+        self.gap_timeout = gap_timeout
+        # Skipped id -> monotonic time after which it is given up on
+        self._gaps: Dict[int, float] = {}
+
+    @property
+    def pending_ids(self) -> List[int]:
+        """Skipped ids still being waited for."""
+        return list(self._gaps)
+
+    def fetch(self, limit: int) -> List[CubeSolve]:
+        now = time.monotonic()
+        self._gaps = {pk: until for pk, until in self._gaps.items() if until > now}
+        unseen = Q(pk__gt=self.last_id)
+        if self._gaps:
+            unseen |= Q(pk__in=list(self._gaps))
+        solves = list(
+            CubeSolve.objects.select_related("state")
+            .filter(unseen)
+            .order_by("pk")[:limit]
+        )
+        for solve in solves:
+            self._gaps.pop(solve.pk, None)
+            if solve.pk > self.last_id:
+                if solve.pk - self.last_id - 1 <= MAX_TRACKED_GAP:
+                    for pk in range(self.last_id + 1, solve.pk):
+                        self._gaps[pk] = now + self.gap_timeout
+                self.last_id = solve.pk
+        return solves
+
+
+def latest_solve_id() -> int:
+    return CubeSolve.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+
+
+def _event(solve: CubeSolve) -> Event:
+    return solve.pk, json.dumps(solve.to_dict())
+
+
+class Subscription:
+    """One stream's queue of events; None in the queue ends the stream."""
+
+    def __init__(self, after_id: Optional[int]):
+        # Resume point for the catch-up (None: only solves saved from now on)
+        self.after_id = after_id
+        self.active = True
+        self.events: "queue.Queue[Optional[Event]]" = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    def get(self, timeout: float) -> Optional[Event]:
+        """Next event, or None once the stream should end; raises queue.Empty."""
+        return self.events.get(timeout=timeout)
+
+    def end(self) -> None:
+        self.active = False
+        while True:
+            try:
+                self.events.put_nowait(None)
+                return
+            except queue.Full:
+                pass
+            # Drop what is queued: the client resumes after the last event it
+            # actually received, so nothing is lost
+            while True:
+                try:
+                    self.events.get_nowait()
+                except queue.Empty:
+                    break
+
+
+class SolveBroadcaster:
+    """The per-process reader that fans new solves out to every stream."""
+
+    def __init__(self, reader: bool = True):
+        # Without a reader thread, step() is left to the caller (tests)
+        self._reader = reader
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        # Waiting for their catch-up, then live
+        self._joining: List[Subscription] = []
+        self._subscribers: Set[Subscription] = set()
+        self._feed: Optional[SolveFeed] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def publish(self) -> None:
+        """A solve was committed in this process: read it without waiting."""
+        self._wake.set()
+
+    def subscribe(self, after_id: Optional[int] = None) -> Subscription:
+        """
+        Start receiving new solves, after first catching up on those newer
+        than ``after_id`` if given.
+        """
+        subscription = Subscription(after_id)
+        with self._lock:
+            if self._closed:
+                subscription.end()
+                return subscription
+            self._joining.append(subscription)
+            if self._reader and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="solve-broadcaster", daemon=True
+                )
+                self._thread.start()
+        self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.active = False
+        with self._lock:
+            self._subscribers.discard(subscription)
+            if subscription in self._joining:
+                self._joining.remove(subscription)
+
+    def close(self) -> None:
+        """End every stream, e.g. because the server process is stopping."""
+        with self._lock:
+            self._closed = True
+            for subscription in (*self._joining, *self._subscribers):
+                subscription.end()
+            self._joining.clear()
+            self._subscribers.clear()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(settings.HISTORY_STREAM_POLL_INTERVAL)
+            self._wake.clear()
+            try:
+                self.step()
+            except Exception as e:
+                print(f"Live history reader failed: {e}")
+            finally:
+                close_old_connections()
+
+    def step(self) -> None:
+        """Read new solves once and hand them to every stream."""
+        with self._lock:
+            if not self._joining and not self._subscribers:
+                # Nobody is listening; start from the latest solve next time
+                self._feed = None
+                return
+        if self._feed is None:
+            self._feed = SolveFeed(
+                latest_solve_id(), settings.HISTORY_STREAM_GAP_TIMEOUT
+            )
+        feed = self._feed
+
+        with self._lock:
+            joining, self._joining = self._joining, []
+        try:
+            for subscription in joining:
+                self._catch_up(subscription, feed)
+            events = [_event(solve) for solve in feed.fetch(SUBSCRIBER_QUEUE_SIZE)]
+        except Exception:
+            # Their catch-up may be half sent; end them so that they resume
+            # rather than wait forever outside both lists
+            for subscription in joining:
+                subscription.end()
+            raise
+        with self._lock:
+            # Joined after their catch-up, so nothing is sent twice or skipped
+            for subscription in joining:
+                if self._closed:
+                    subscription.end()
+                elif subscription.active:
+                    self._subscribers.add(subscription)
+            for subscription in list(self._subscribers):
+                try:
+                    for event in events:
+                        subscription.events.put_nowait(event)
+                except queue.Full:
+                    # Too far behind: end the stream so the client resumes
+                    self._subscribers.discard(subscription)
+                    subscription.end()
+        if len(events) == SUBSCRIBER_QUEUE_SIZE:
+            self._wake.set()
+
+    def _catch_up(self, subscription: Subscription, feed: SolveFeed) -> None:
+        """Queue the most recent solves a resuming stream missed."""
+        if subscription.after_id is None or subscription.after_id >= feed.last_id:
+            return
+        missed = (
+            CubeSolve.objects.select_related("state")
+            .filter(pk__gt=subscription.after_id, pk__lte=feed.last_id)
+            .exclude(pk__in=feed.pending_ids)
+            .order_by("-pk")[: settings.HISTORY_STREAM_MAX_BACKLOG]
+        )
+        for solve in reversed(list(missed)):
+            subscription.events.put_nowait(_event(solve))
+
+
+broadcaster = SolveBroadcaster()
@@ -0,0 +1,198 @@
+"""
+Database-backed queue for background solve jobs.
+
+Any number of ``manage.py solve_worker`` processes can share the queue
+without an external broker. A worker claims a job with a conditional UPDATE
+that only succeeds if the row is still in the state the worker saw, so two
+workers never run the same job. Claims are leases: the worker renews the
+lease each time it saves the results so far, and a job whose lease lapses
+is handed to the next worker, which resumes after the last saved result.
+Jobs are given up on after ``max_attempts`` claims.
+
+Solves are added to the history in the same transaction that saves their
+results, so a retried job never records the same cube twice.
+"""
+
+import time
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, QuerySet
+from django.utils import timezone
+
+from .events import broadcaster
+from .models import CubeSolve, SolveJob
+from .solving import SolveFailed
+from . import solving
+
+# Conditional updates retried before a worker gives up on one claim round
+_CLAIM_RETRIES = 5
+
+
+def _lease_expiry(lease: float):
+    return timezone.now() + timedelta(seconds=lease)
+
+
+def claim_job(worker_id: str, lease: Optional[float] = None) -> Optional[SolveJob]:
+    """Claim the oldest runnable job for ``worker_id``, or return None."""
+    lease = lease or settings.SOLVE_JOB_LEASE
+    now = timezone.now()
+    lapsed = Q(status=SolveJob.RUNNING, lease_expires_at__lt=now)
+
+    # Jobs that keep losing their worker are not retried forever
+    SolveJob.objects.filter(lapsed, attempts__gte=F("max_attempts")).update(
+        status=SolveJob.FAILED,
+        error="Worker stopped responding too many times",
+        worker="",
+        lease_expires_at=None,
+        finished_at=now,
+    )
+
+    runnable = Q(status=SolveJob.QUEUED) | lapsed
+    for _ in range(_CLAIM_RETRIES):
+        candidate = (
+            SolveJob.objects.filter(runnable)
+            .order_by("pk")
+            .values("pk", "attempts")
+            .first()
+        )
+        if candidate is None:
+            return None
+        # Matching on attempts makes this a compare-and-swap: if another
+        # worker claimed the row since we read it, nothing is updated.
+        claimed = SolveJob.objects.filter(
+            runnable, pk=candidate["pk"], attempts=candidate["attempts"]
+        ).update(
+            status=SolveJob.RUNNING,
+            worker=worker_id,
+            attempts=F("attempts") + 1,
+            lease_expires_at=_lease_expiry(lease),
+            started_at=now,
+        )
+        if claimed:
+            return SolveJob.objects.get(pk=candidate["pk"])
+    return None
+
+
+def solve_facelet_string(
+    facelet_string: str, mode: str, ip_address: Optional[str] = None
+) -> Tuple[Dict[str, object], Optional[CubeSolve]]:
+    """
+    Solve one cube of a job. Returns its result and the history entry to save
+    along with it (None if it could not be solved).
+    """
+    result: Dict[str, object] = {"facelet_string": facelet_string, "mode": mode}
+    try:
+        solution = solving.solve(facelet_string, mode)
+    except SolveFailed as e:
+        result["error"] = str(e)
+        if e.details:
+            result["details"] = e.details
+        return result, None
+
+    solve = solving.prepare_solve(facelet_string, solution, ip_address)
+    result.update(
+        mode=solution.mode,
+        solution=solution.moves,
+        move_count=len(solution.moves),
+        solve_time_ms=round(solution.solve_time_ms, 2),
+    )
+    if solution.stages is not None:
+        result["stages"] = solution.stages
+    return result, solve
+
+
+def _save_progress(mine: QuerySet, pending: List[CubeSolve], **fields) -> bool:
+    """
+    Save the job's progress, and the solves done since the last save, in one
+    transaction. Returns False, saving nothing, if the job is no longer ours.
+    """
+    with transaction.atomic():
+        if not mine.update(**fields):
+            return False
+        CubeSolve.objects.bulk_create(pending)
+        # bulk_create sends no post_save, so tell the live feed directly
+        if pending:
+            transaction.on_commit(broadcaster.publish)
+    pending.clear()
+    return True
+
+
+def release_job(job: SolveJob, worker_id: str) -> None:
+    """Hand a job back to the queue without counting the attempt."""
+    SolveJob.objects.filter(
+        pk=job.pk, worker=worker_id, status=SolveJob.RUNNING
+    ).update(
+        status=SolveJob.QUEUED,
+        worker="",
+        lease_expires_at=None,
+        attempts=F("attempts") - 1,
+    )
+
+
+def run_job(
+    job: SolveJob,
+    worker_id: str,
+    lease: Optional[float] = None,
+    should_stop: Callable[[], bool] = lambda: False,
+) -> bool:
+    """
+    Solve the remaining cubes of a claimed job.
+
+    Returns False if the job was released because ``should_stop`` returned
+    True, or abandoned because another worker took over its lease.
+    """
+    lease = lease or settings.SOLVE_JOB_LEASE
+    mine = SolveJob.objects.filter(pk=job.pk, worker=worker_id, status=SolveJob.RUNNING)
+    results = list(job.results)
+    # History entries for the results not saved yet
+    pending: List[CubeSolve] = []
+    last_saved = time.monotonic()
+    try:
+        for facelet_string in job.facelet_strings[len(results) :]:
+            if should_stop():
+                _save_progress(mine, pending, results=results)
+                release_job(job, worker_id)
+                return False
+            result, solve = solve_facelet_string(
+                facelet_string, job.mode, job.ip_address
+            )
+            results.append(result)
+            if solve is not None:
+                pending.append(solve)
+            # Saving progress doubles as the lease heartbeat; batches of fast
+            # solves are saved periodically rather than after every cube.
+            if time.monotonic() - last_saved >= settings.SOLVE_JOB_SAVE_INTERVAL:
+                if not _save_progress(
+                    mine,
+                    pending,
+                    results=results,
+                    lease_expires_at=_lease_expiry(lease),
+                ):
+                    return False
+                last_saved = time.monotonic()
+    except Exception as e:
+        # Unexpected failures are retried like a dead worker would be
+        status = (
+            SolveJob.FAILED if job.attempts >= job.max_attempts else SolveJob.QUEUED
+        )
+        mine.update(
+            status=status,
+            error=str(e),
+            worker="",
+            lease_expires_at=None,
+            finished_at=timezone.now() if status == SolveJob.FAILED else None,
+        )
+        raise
+
+    return _save_progress(
+        mine,
+        pending,
+        status=SolveJob.DONE,
+        results=results,
+        worker="",
+        lease_expires_at=None,
+        finished_at=timezone.now(),
+    )
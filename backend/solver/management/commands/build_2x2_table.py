@@ -0,0 +1,25 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from solver.pocket import (
+    build_distance_table,
+    distance_table_path,
+    save_distance_table,
+)
+
+
+class Command(BaseCommand):
+    help = "Build the complete 2x2 distance-to-solved table used by the 2x2 solver."
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        Path(settings.PATTERN_DB_DIR).mkdir(parents=True, exist_ok=True)
+        path = distance_table_path()
+        save_distance_table(build_distance_table(), path)
+        self.stdout.write(
+            f"Built {path} ({path.stat().st_size} bytes) "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
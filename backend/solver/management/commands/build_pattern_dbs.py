@@ -0,0 +1,46 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from solver.pattern import (
+    CFOP_PATTERN_DATABASES,
+    PATTERN_DATABASES,
+    pattern_database_class,
+    pattern_db_path,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the pattern database files used by the optimal and CFOP solvers "
+        "(the optimal solver's corner and edge databases take several minutes each)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            help="Databases to build (defaults to all of them)",
+        )
+
+    def handle(self, *args, **options):
+        databases = {**PATTERN_DATABASES, **CFOP_PATTERN_DATABASES}
+        names = options["names"] or list(databases)
+        unknown = set(names) - set(databases)
+        if unknown:
+            raise CommandError(f"Unknown pattern databases: {', '.join(unknown)}")
+
+        Path(settings.PATTERN_DB_DIR).mkdir(parents=True, exist_ok=True)
+        for name in names:
+            start = time.perf_counter()
+            corners, edges = databases[name]
+            database = pattern_database_class(name)(name, corners, edges)
+            database.build()
+            path = pattern_db_path(name)
+            database.save(path)
+            self.stdout.write(
+                f"Built {name} ({path.stat().st_size} bytes) "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
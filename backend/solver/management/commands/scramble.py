@@ -0,0 +1,48 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from solver.pool import shutdown_pool
+from solver.scramble import generate_scrambles
+
+
+class Command(BaseCommand):
+    help = "Generate uniformly random cube states, one JSON object per line."
+
+    def add_arguments(self, parser):
+        parser.add_argument("count", type=int, help="Number of states to generate")
+        parser.add_argument(
+            "--sequences",
+            action="store_true",
+            help="Include a scramble sequence for each state (solves every state)",
+        )
+        parser.add_argument("--seed", type=int, help="Seed for reproducible output")
+        parser.add_argument(
+            "--output", help="Write to this file instead of standard output"
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            scrambles = generate_scrambles(
+                options["count"],
+                with_sequences=options["sequences"],
+                seed=options["seed"],
+                use_pool=True,
+            )
+        finally:
+            shutdown_pool()
+        elapsed = time.perf_counter() - start
+
+        lines = "\n".join(json.dumps(s) for s in scrambles)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(lines + "\n")
+        else:
+            self.stdout.write(lines)
+
+        rate = len(scrambles) / elapsed if elapsed else float("inf")
+        self.stderr.write(
+            f"Generated {len(scrambles)} states in {elapsed:.2f}s ({rate:.0f}/s)"
+        )
@@ -0,0 +1,62 @@
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from solver.jobs import claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued solve jobs (POST /jobs/). Start several for more throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of waiting for new jobs",
+        )
+        parser.add_argument(
+            "--worker-id",
+            default=f"{socket.gethostname()}:{os.getpid()}",
+            help="Name recorded on claimed jobs (defaults to host:pid)",
+        )
+
+    def handle(self, *args, **options):
+        worker_id = options["worker_id"]
+        stopping = False
+
+        def stop(signum, frame):
+            # Finish the current cube, then hand the job back to the queue
+            nonlocal stopping
+            stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(f"Solve worker {worker_id} started")
+        while not stopping:
+            job = claim_job(worker_id)
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(settings.SOLVE_JOB_POLL_INTERVAL)
+                continue
+
+            start = time.perf_counter()
+            try:
+                finished = run_job(job, worker_id, should_stop=lambda: stopping)
+            except Exception as e:
+                self.stderr.write(f"Job {job.pk} failed: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            if finished:
+                self.stdout.write(
+                    f"Job {job.pk}: solved {len(job.facelet_strings)} cube(s) "
+                    f"in {elapsed:.2f}s"
+                )
+            else:
+                self.stdout.write(f"Job {job.pk}: released after {elapsed:.2f}s")
+        self.stdout.write(f"Solve worker {worker_id} stopped")
@@ -0,0 +1,70 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from solver.models import CubeState
+from solver.verify import find_mismatches
+
+
+class Command(BaseCommand):
+    help = "Check that every stored solution solves its cube state."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Rows read from the database and verified per batch",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of verifier processes (defaults to the CPU count)",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        workers = options["workers"]
+        if chunk_size < 1 or workers < 1:
+            raise CommandError("--chunk-size and --workers must be positive")
+
+        start = time.perf_counter()
+        checked = 0
+        mismatches = []
+
+        rows = (
+            CubeState.objects.order_by("pk")
+            .values_list("pk", "facelet_string", "solution")
+            .iterator(chunk_size=chunk_size)
+        )
+        chunks = iter(lambda: list(islice(rows, chunk_size)), [])
+
+        # Keep a bounded number of chunks in flight so memory stays flat
+        # regardless of table size.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for chunk in chunks:
+                checked += len(chunk)
+                pending.add(pool.submit(find_mismatches, chunk))
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        mismatches.extend(future.result())
+            for future in pending:
+                mismatches.extend(future.result())
+
+        for row_id, reason in sorted(mismatches):
+            self.stdout.write(f"CubeState {row_id}: {reason}")
+
+        elapsed = time.perf_counter() - start
+        summary = (
+            f"Checked {checked} cube states in {elapsed:.2f}s, "
+            f"{len(mismatches)} mismatch(es)"
+        )
+        if mismatches:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,66 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("solver", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CubeState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "facelet_string",
+                    models.CharField(
+                        help_text="The 54-character kociemba facelet string representing the cube state",
+                        max_length=54,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "solution",
+                    models.TextField(
+                        help_text="The solution moves as a space-separated string"
+                    ),
+                ),
+                (
+                    "move_count",
+                    models.IntegerField(help_text="Number of moves in the solution"),
+                ),
+                (
+                    "first_seen",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        help_text="When this state was first solved",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Cube State",
+                "verbose_name_plural": "Cube States",
+            },
+        ),
+        migrations.AddField(
+            model_name="cubesolve",
+            name="state",
+            field=models.ForeignKey(
+                help_text="The cube state that was solved",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="solves",
+                to="solver.cubestate",
+            ),
+        ),
+    ]
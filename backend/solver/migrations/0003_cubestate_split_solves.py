@@ -0,0 +1,66 @@
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def split_states(apps, schema_editor):
+    """Create one CubeState per distinct facelet string and link every solve."""
+    CubeSolve = apps.get_model("solver", "CubeSolve")
+    CubeState = apps.get_model("solver", "CubeState")
+
+    state_ids = {}
+    solves = CubeSolve.objects.order_by("timestamp", "pk").iterator(
+        chunk_size=BATCH_SIZE
+    )
+    pending = []
+    for solve in solves:
+        state_id = state_ids.get(solve.facelet_string)
+        if state_id is None:
+            state = CubeState.objects.create(
+                facelet_string=solve.facelet_string,
+                solution=solve.solution,
+                move_count=solve.move_count,
+                first_seen=solve.timestamp,
+            )
+            state_id = state_ids[solve.facelet_string] = state.pk
+        solve.state_id = state_id
+        pending.append(solve)
+        if len(pending) >= BATCH_SIZE:
+            CubeSolve.objects.bulk_update(pending, ["state"])
+            pending = []
+    CubeSolve.objects.bulk_update(pending, ["state"], batch_size=BATCH_SIZE)
+
+
+def merge_states(apps, schema_editor):
+    """Copy state data back onto each solve."""
+    CubeSolve = apps.get_model("solver", "CubeSolve")
+
+    pending = []
+    for solve in CubeSolve.objects.select_related("state").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        solve.facelet_string = solve.state.facelet_string
+        solve.solution = solve.state.solution
+        solve.move_count = solve.state.move_count
+        pending.append(solve)
+        if len(pending) >= BATCH_SIZE:
+            CubeSolve.objects.bulk_update(
+                pending, ["facelet_string", "solution", "move_count"]
+            )
+            pending = []
+    CubeSolve.objects.bulk_update(
+        pending, ["facelet_string", "solution", "move_count"], batch_size=BATCH_SIZE
+    )
+
+
+# The schema changes on either side are separate migrations: PostgreSQL
+# refuses to ALTER a table with pending trigger events from updates made
+# earlier in the same transaction.
+class Migration(migrations.Migration):
+    dependencies = [
+        ("solver", "0002_cubestate"),
+    ]
+
+    operations = [
+        migrations.RunPython(split_states, merge_states),
+    ]
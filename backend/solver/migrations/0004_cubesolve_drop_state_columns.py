@@ -0,0 +1,58 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("solver", "0003_cubestate_split_solves"),
+    ]
+
+    operations = [
+        # Defaults let these columns be re-added to existing rows when
+        # migrating backwards; merge_states then fills in the real values.
+        migrations.AlterField(
+            model_name="cubesolve",
+            name="facelet_string",
+            field=models.CharField(
+                default="",
+                help_text="The 54-character kociemba facelet string representing the cube state",
+                max_length=54,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="cubesolve",
+            name="solution",
+            field=models.TextField(
+                default="", help_text="The solution moves as a space-separated string"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="cubesolve",
+            name="move_count",
+            field=models.IntegerField(
+                default=0, help_text="Number of moves in the solution"
+            ),
+        ),
+        migrations.RemoveField(
+            model_name="cubesolve",
+            name="facelet_string",
+        ),
+        migrations.RemoveField(
+            model_name="cubesolve",
+            name="solution",
+        ),
+        migrations.RemoveField(
+            model_name="cubesolve",
+            name="move_count",
+        ),
+        migrations.AlterField(
+            model_name="cubesolve",
+            name="state",
+            field=models.ForeignKey(
+                help_text="The cube state that was solved",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="solves",
+                to="solver.cubestate",
+            ),
+        ),
+    ]
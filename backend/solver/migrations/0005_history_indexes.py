@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-19 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("solver", "0004_cubesolve_drop_state_columns"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cubesolve",
+            index=models.Index(fields=["-timestamp"], name="cubesolve_timestamp_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cubesolve",
+            index=models.Index(
+                fields=["ip_address", "-timestamp"], name="cubesolve_ip_timestamp_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cubestate",
+            index=models.Index(fields=["move_count"], name="cubestate_move_count_idx"),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-19 09:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("solver", "0005_history_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cubestate",
+            name="mode",
+            field=models.CharField(
+                choices=[
+                    ("kociemba", "Kociemba two-phase"),
+                    ("optimal", "Optimal (IDA* with pattern databases)"),
+                ],
+                default="kociemba",
+                help_text="Solver that produced the solution",
+                max_length=16,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="cubestate",
+            name="facelet_string",
+            field=models.CharField(
+                help_text="The 54-character kociemba facelet string representing the cube state",
+                max_length=54,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="cubestate",
+            constraint=models.UniqueConstraint(
+                fields=("facelet_string", "mode"), name="unique_state_per_mode"
+            ),
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.3 on 2026-10-19 09:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("solver", "0006_cubestate_mode"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SolveJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="queued",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "mode",
+                    models.CharField(
+                        choices=[
+                            ("kociemba", "Kociemba two-phase"),
+                            ("optimal", "Optimal (IDA* with pattern databases)"),
+                        ],
+                        default="kociemba",
+                        help_text="Solver requested for 3x3 cubes (2x2 cubes are always optimal)",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "facelet_strings",
+                    models.JSONField(help_text="Facelet strings of the cubes to solve"),
+                ),
+                (
+                    "results",
+                    models.JSONField(
+                        default=list,
+                        help_text="One result per solved cube, in submission order",
+                    ),
+                ),
+                (
+                    "ip_address",
+                    models.GenericIPAddressField(
+                        blank=True,
+                        help_text="IP address of the client (optional)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "worker",
+                    models.CharField(
+                        blank=True,
+                        help_text="Worker currently holding the job",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "lease_expires_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="When the worker's claim on the job lapses",
+                        null=True,
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.IntegerField(
+                        default=0, help_text="Times a worker claimed the job"
+                    ),
+                ),
+                ("max_attempts", models.IntegerField(default=3)),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Solve Job",
+                "verbose_name_plural": "Solve Jobs",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "lease_expires_at"], name="solvejob_claim_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-19 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("solver", "0007_solvejob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="cubestate",
+            name="mode",
+            field=models.CharField(
+                choices=[
+                    ("kociemba", "Kociemba two-phase"),
+                    ("optimal", "Optimal (IDA* with pattern databases)"),
+                    ("cfop", "CFOP (cross, F2L, OLL, PLL)"),
+                ],
+                default="kociemba",
+                help_text="Solver that produced the solution",
+                max_length=16,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="solvejob",
+            name="mode",
+            field=models.CharField(
+                choices=[
+                    ("kociemba", "Kociemba two-phase"),
+                    ("optimal", "Optimal (IDA* with pattern databases)"),
+                    ("cfop", "CFOP (cross, F2L, OLL, PLL)"),
+                ],
+                default="kociemba",
+                help_text="Solver requested for 3x3 cubes (2x2 cubes are always optimal)",
+                max_length=16,
+            ),
+        ),
+    ]
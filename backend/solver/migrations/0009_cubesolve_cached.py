@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-19 09:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("solver", "0008_cubestate_cfop_mode"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cubesolve",
+            name="cached",
+            field=models.BooleanField(
+                default=False,
+                help_text="Solution was looked up, not worked out (solve_time_ms is the lookup)",
+            ),
+        ),
+    ]
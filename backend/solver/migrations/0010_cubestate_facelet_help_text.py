@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-19 09:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("solver", "0009_cubesolve_cached"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="cubestate",
+            name="facelet_string",
+            field=models.CharField(
+                help_text="Kociemba facelet string of the cube state (54 characters, or 24 for a 2x2)",
+                max_length=54,
+            ),
+        ),
+    ]
@@ -1,21 +1,128 @@
+from typing import Optional
+
 from django.db import models
 from django.utils import timezone
 
 
-class CubeSolve(models.Model):
+class CubeState(models.Model):
     """
-    Model to store Rubik's cube solve records.
+    A distinct cube state and its solution, stored once per solver mode
+    however many times it is solved.
     """
 
+    KOCIEMBA = "kociemba"
+    OPTIMAL = "optimal"
+    CFOP = "cfop"
+    MODE_CHOICES = [
+        (KOCIEMBA, "Kociemba two-phase"),
+        (OPTIMAL, "Optimal (IDA* with pattern databases)"),
+        (CFOP, "CFOP (cross, F2L, OLL, PLL)"),
+    ]
+
     facelet_string = models.CharField(
         max_length=54,
-        help_text="The 54-character kociemba facelet string representing the cube state",
+        help_text="Kociemba facelet string of the cube state (54 characters, or 24 for a 2x2)",
+    )
+    mode = models.CharField(
+        max_length=16,
+        choices=MODE_CHOICES,
+        default=KOCIEMBA,
+        help_text="Solver that produced the solution",
     )
     solution = models.TextField(
         help_text="The solution moves as a space-separated string"
     )
     move_count = models.IntegerField(help_text="Number of moves in the solution")
+    first_seen = models.DateTimeField(
+        default=timezone.now, help_text="When this state was first solved"
+    )
+
+    class Meta:
+        verbose_name = "Cube State"
+        verbose_name_plural = "Cube States"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["facelet_string", "mode"], name="unique_state_per_mode"
+            ),
+        ]
+        indexes = [
+            # min_moves/max_moves filters on /history/ find matching states
+            # here, then their solves through the state foreign key index
+            models.Index(fields=["move_count"], name="cubestate_move_count_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.facelet_string} ({self.mode}) - {self.move_count} moves"
+
+
+class CubeSolveManager(models.Manager):
+    def record(
+        self,
+        facelet_string: str,
+        solution: str,
+        move_count: int,
+        solve_time_ms: float,
+        ip_address: Optional[str] = None,
+        mode: str = CubeState.KOCIEMBA,
+        cached: bool = False,
+    ) -> "CubeSolve":
+        """Store a solve, reusing the existing CubeState for known states."""
+        solve = self.prepare(
+            facelet_string,
+            solution,
+            move_count,
+            solve_time_ms,
+            ip_address,
+            mode,
+            cached,
+        )
+        solve.save(force_insert=True)
+        return solve
+
+    def prepare(
+        self,
+        facelet_string: str,
+        solution: str,
+        move_count: int,
+        solve_time_ms: float,
+        ip_address: Optional[str] = None,
+        mode: str = CubeState.KOCIEMBA,
+        cached: bool = False,
+    ) -> "CubeSolve":
+        """Like record(), but leave saving the solve to the caller (bulk_create)."""
+        state, _ = CubeState.objects.get_or_create(
+            facelet_string=facelet_string,
+            mode=mode,
+            defaults={"solution": solution, "move_count": move_count},
+        )
+        return self.model(
+            state=state,
+            solve_time_ms=solve_time_ms,
+            ip_address=ip_address,
+            cached=cached,
+        )
+
+
+class CubeSolve(models.Model):
+    """
+    Model to store Rubik's cube solve records.
+
+    The cube state and its solution live on the related CubeState; each solve
+    only records when, how fast and for whom it was performed, and whether the
+    solution was simply looked up because the state had been solved before.
+    """
+
+    state = models.ForeignKey(
+        CubeState,
+        on_delete=models.CASCADE,
+        related_name="solves",
+        help_text="The cube state that was solved",
+    )
     solve_time_ms = models.FloatField(help_text="Time taken to solve in milliseconds")
+    cached = models.BooleanField(
+        default=False,
+        help_text="Solution was looked up, not worked out (solve_time_ms is the lookup)",
+    )
     timestamp = models.DateTimeField(
         default=timezone.now, help_text="When the solve was performed"
     )
@@ -23,10 +130,134 @@ class CubeSolve(models.Model):
         null=True, blank=True, help_text="IP address of the client (optional)"
     )
 
+    objects = CubeSolveManager()
+
     class Meta:
         ordering = ["-timestamp"]
         verbose_name = "Cube Solve"
         verbose_name_plural = "Cube Solves"
+        indexes = [
+            # Newest-first listing and since/until windows
+            models.Index(fields=["-timestamp"], name="cubesolve_timestamp_idx"),
+            # Solves from one client, newest first
+            models.Index(
+                fields=["ip_address", "-timestamp"], name="cubesolve_ip_timestamp_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Solve at {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')} - {self.move_count} moves"
+
+    @property
+    def facelet_string(self) -> str:
+        return self.state.facelet_string
+
+    @property
+    def solution(self) -> str:
+        return self.state.solution
+
+    @property
+    def move_count(self) -> int:
+        return self.state.move_count
+
+    @property
+    def mode(self) -> str:
+        return self.state.mode
+
+    def to_dict(self) -> dict:
+        """JSON-serializable representation used by the history endpoints."""
+        return {
+            "id": self.id,  # type: ignore
+            "facelet_string": self.facelet_string,
+            "solution": self.solution.split() if self.solution else [],
+            "move_count": self.move_count,
+            "mode": self.mode,
+            "solve_time_ms": self.solve_time_ms,
+            "cached": self.cached,
+            "timestamp": self.timestamp.isoformat(),
+            "ip_address": self.ip_address,
+        }
+
+
+class SolveJob(models.Model):
+    """
+    A batch of cube states solved in the background by ``manage.py solve_worker``.
+
+    Workers claim a job by moving it to RUNNING with a lease and store results
+    as they go, renewing the lease each time they save (every
+    SOLVE_JOB_SAVE_INTERVAL seconds). A job whose lease runs
+    out (its worker died) is claimed again and resumes where it stopped.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    mode = models.CharField(
+        max_length=16,
+        choices=CubeState.MODE_CHOICES,
+        default=CubeState.KOCIEMBA,
+        help_text="Solver requested for 3x3 cubes (2x2 cubes are always optimal)",
+    )
+    facelet_strings = models.JSONField(
+        help_text="Facelet strings of the cubes to solve"
+    )
+    results = models.JSONField(
+        default=list, help_text="One result per solved cube, in submission order"
+    )
+    ip_address = models.GenericIPAddressField(
+        null=True, blank=True, help_text="IP address of the client (optional)"
+    )
+    worker = models.CharField(
+        max_length=255, blank=True, help_text="Worker currently holding the job"
+    )
+    lease_expires_at = models.DateTimeField(
+        null=True, blank=True, help_text="When the worker's claim on the job lapses"
+    )
+    attempts = models.IntegerField(
+        default=0, help_text="Times a worker claimed the job"
+    )
+    max_attempts = models.IntegerField(default=3)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Solve Job"
+        verbose_name_plural = "Solve Jobs"
+        indexes = [
+            # Workers look for queued jobs and running jobs with lapsed leases
+            models.Index(
+                fields=["status", "lease_expires_at"], name="solvejob_claim_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk} ({self.status}) - {len(self.results)}/{len(self.facelet_strings)} cubes"
+
+    def to_dict(self, include_results: bool = True) -> dict:
+        """JSON-serializable representation used by the jobs endpoints."""
+        data = {
+            "job_id": self.id,  # type: ignore
+            "status": self.status,
+            "mode": self.mode,
+            "total": len(self.facelet_strings),
+            "completed": len(self.results),
+            "attempts": self.attempts,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if include_results:
+            data["results"] = self.results
+        return data
@@ -0,0 +1,96 @@
+"""
+Optimal (fewest face turns) 3x3 solver.
+
+IDA* search over face turns, pruned with the maximum of the corner and edge
+pattern database distances (Korf's: all eight corners, and two groups of six
+edges). Each database is exact for its own pieces, so the heuristic never
+overestimates and the first solution found is optimal.
+"""
+
+import time
+from typing import List, Optional
+
+from .cube import FACES, MOVE_NAMES, facelets_to_state
+from .pattern import (
+    CORNER_CODE_MOVES,
+    EDGE_CODE_MOVES,
+    PATTERN_DATABASES,
+    get_pattern_database,
+    state_to_codes,
+)
+
+_MOVE_FACES = [FACES.index(name[0]) for name in MOVE_NAMES]
+
+
+class SearchLimitExceeded(Exception):
+    """Raised when the search hits its node or time cap before finishing."""
+
+
+def solve_optimal(
+    facelet_string: str, max_nodes: int, time_limit: Optional[float] = None
+) -> List[str]:
+    """
+    Return an optimal move sequence for ``facelet_string``.
+
+    Raises ValueError for invalid states, SearchLimitExceeded when more than
+    ``max_nodes`` nodes or ``time_limit`` seconds are needed, and
+    PatternDatabaseMissing if the databases have not been built.
+    """
+    corner_codes, edge_codes = state_to_codes(facelets_to_state(facelet_string))
+    databases = [get_pattern_database(name) for name in PATTERN_DATABASES]
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+
+    def heuristic(corners: List[int], edges: List[int]) -> int:
+        return max(db.lookup(corners, edges) for db in databases)
+
+    path: List[int] = []
+    nodes = 0
+
+    def search(
+        corners: List[int], edges: List[int], depth: int, bound: int, last_face: int
+    ) -> int:
+        nonlocal nodes
+        nodes += 1
+        if nodes > max_nodes:
+            raise SearchLimitExceeded(f"Node limit of {max_nodes} reached")
+        if deadline is not None and nodes & 0xFFF == 0 and time.monotonic() > deadline:
+            raise SearchLimitExceeded(f"Time limit of {time_limit}s reached")
+
+        # The databases are read one at a time, and the node is cut off as
+        # soon as one of them puts it past the bound (usually the corners)
+        h = 0
+        for database in databases:
+            h = max(h, database.lookup(corners, edges))
+            if depth + h > bound:
+                return depth + h
+        if h == 0:
+            return -1
+
+        smallest = 1 << 30
+        for move, face in enumerate(_MOVE_FACES):
+            # Never turn the same face twice in a row, and only turn opposite
+            # faces in one fixed order
+            if face == last_face or face == last_face - 3:
+                continue
+            corner_table = CORNER_CODE_MOVES[move]
+            edge_table = EDGE_CODE_MOVES[move]
+            path.append(move)
+            result = search(
+                [corner_table[c] for c in corners],
+                [edge_table[e] for e in edges],
+                depth + 1,
+                bound,
+                face,
+            )
+            if result < 0:
+                return result
+            path.pop()
+            smallest = min(smallest, result)
+        return smallest
+
+    bound = heuristic(corner_codes, edge_codes)
+    while True:
+        result = search(corner_codes, edge_codes, 0, bound, -1)
+        if result < 0:
+            return [MOVE_NAMES[move] for move in path]
+        bound = result
@@ -0,0 +1,527 @@
+"""
+Pattern databases: exact move distances for subsets of the cube's pieces.
+
+Each cubie is tracked by a "code" combining its position and orientation
+(position * 3 + twist for corners, position * 2 + flip for edges), so every
+piece has 24 codes and a move is a small per-piece lookup table. A database
+covering k pieces maps the k codes to an index below 24**k and stores the
+number of moves needed to bring those pieces home, two entries per byte.
+That index is cheap enough for the CFOP search's small groups of pieces.
+
+The optimal solver uses Korf's databases instead: all eight corners (88
+million states) and two groups of six edges (43 million each). These are
+indexed by the rank of their pieces' arrangement, which leaves no unused
+entries (24**8 codes would need 55 GB), and built by a breadth-first search
+that moves whole rows of states at once.
+
+Databases are built offline by ``manage.py build_pattern_dbs`` and opened
+with mmap, so all worker processes on a host share one page-cache copy.
+"""
+
+import array
+import itertools
+import math
+import mmap
+import os
+import struct
+from operator import getitem, itemgetter, mul
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from .cube import MOVE_NAMES, MOVES, CubieState
+
+CODES_PER_PIECE = 24
+UNKNOWN_DISTANCE = 15
+
+# CORNER_CODE_MOVES[m][code] is the code of a corner after move m
+CORNER_CODE_MOVES: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(
+        MOVES[name][0].index(pos) * 3
+        + (ori + MOVES[name][1][MOVES[name][0].index(pos)]) % 3
+        for pos in range(8)
+        for ori in range(3)
+    )
+    for name in MOVE_NAMES
+)
+EDGE_CODE_MOVES: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(
+        MOVES[name][2].index(pos) * 2
+        + (ori + MOVES[name][3][MOVES[name][2].index(pos)]) % 2
+        for pos in range(12)
+        for ori in range(2)
+    )
+    for name in MOVE_NAMES
+)
+
+SOLVED_CORNER_CODES: Tuple[int, ...] = tuple(j * 3 for j in range(8))
+SOLVED_EDGE_CODES: Tuple[int, ...] = tuple(j * 2 for j in range(12))
+
+_HEADER = struct.Struct("<8sB8sB12s")
+
+
+class PatternDatabaseMissing(Exception):
+    """Raised when a pattern database file has not been built yet."""
+
+
+def state_to_codes(state: CubieState) -> Tuple[List[int], List[int]]:
+    """Return per-cubie corner and edge codes for a cubie state."""
+    cp, co, ep, eo = state
+    corner_codes = [0] * 8
+    for pos, (cubie, ori) in enumerate(zip(cp, co)):
+        corner_codes[cubie] = pos * 3 + ori
+    edge_codes = [0] * 12
+    for pos, (cubie, ori) in enumerate(zip(ep, eo)):
+        edge_codes[cubie] = pos * 2 + ori
+    return corner_codes, edge_codes
+
+
+class PatternDatabase:
+    """Distance table for a fixed set of corner and edge cubies."""
+
+    MAGIC = b"CUBEPDB1"
+
+    def __init__(
+        self,
+        name: str,
+        corners: Sequence[int],
+        edges: Sequence[int],
+        data: Optional[bytes | mmap.mmap] = None,
+        offset: int = 0,
+    ):
+        self.name = name
+        self.corners = tuple(corners)
+        self.edges = tuple(edges)
+        self.size = CODES_PER_PIECE ** (len(self.corners) + len(self.edges))
+        self._data = data
+        self._offset = offset
+
+    def index(self, corner_codes: Sequence[int], edge_codes: Sequence[int]) -> int:
+        index = 0
+        for cubie in self.corners:
+            index = index * CODES_PER_PIECE + corner_codes[cubie]
+        for cubie in self.edges:
+            index = index * CODES_PER_PIECE + edge_codes[cubie]
+        return index
+
+    def distance(self, index: int) -> int:
+        if self._data is None:
+            raise PatternDatabaseMissing(f"Pattern database {self.name} is not loaded")
+        byte = self._data[self._offset + (index >> 1)]
+        return (byte >> ((index & 1) << 2)) & 0xF
+
+    def prefetch(self) -> None:
+        """Ask the kernel to read a memory-mapped database into the page cache."""
+        if isinstance(self._data, mmap.mmap) and hasattr(mmap, "MADV_WILLNEED"):
+            self._data.madvise(mmap.MADV_WILLNEED)
+
+    def lookup(self, corner_codes: Sequence[int], edge_codes: Sequence[int]) -> int:
+        return self.distance(self.index(corner_codes, edge_codes))
+
+    def build(self) -> None:
+        """Fill the table by breadth-first search outward from the solved state."""
+        n_corners = len(self.corners)
+        move_tables = [CORNER_CODE_MOVES[m] for m in range(len(MOVE_NAMES))]
+        edge_tables = [EDGE_CODE_MOVES[m] for m in range(len(MOVE_NAMES))]
+
+        distances = bytearray([UNKNOWN_DISTANCE]) * self.size
+        start = tuple(SOLVED_CORNER_CODES[c] for c in self.corners) + tuple(
+            SOLVED_EDGE_CODES[e] for e in self.edges
+        )
+        distances[self._encode(start)] = 0
+        frontier = [start]
+        depth = 0
+        while frontier:
+            depth += 1
+            if depth >= UNKNOWN_DISTANCE:
+                raise ValueError(f"{self.name} is too deep to pack into 4 bits")
+            next_frontier = []
+            for codes in frontier:
+                for corner_table, edge_table in zip(move_tables, edge_tables):
+                    moved = tuple(corner_table[c] for c in codes[:n_corners]) + tuple(
+                        edge_table[e] for e in codes[n_corners:]
+                    )
+                    index = self._encode(moved)
+                    if distances[index] == UNKNOWN_DISTANCE:
+                        distances[index] = depth
+                        next_frontier.append(moved)
+            frontier = next_frontier
+
+        packed = bytearray((self.size + 1) // 2)
+        for i in range(0, self.size - 1, 2):
+            packed[i >> 1] = distances[i] | (distances[i + 1] << 4)
+        if self.size % 2:
+            packed[-1] = distances[-1]
+        self._data = bytes(packed)
+        self._offset = 0
+
+    def _encode(self, codes: Sequence[int]) -> int:
+        index = 0
+        for code in codes:
+            index = index * CODES_PER_PIECE + code
+        return index
+
+    def save(self, path: Path) -> None:
+        if self._data is None:
+            raise PatternDatabaseMissing(f"Pattern database {self.name} is not built")
+        header = _HEADER.pack(
+            self.MAGIC,
+            len(self.corners),
+            bytes(self.corners).ljust(8, b"\0"),
+            len(self.edges),
+            bytes(self.edges).ljust(12, b"\0"),
+        )
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(self._data)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, name: str, path: Path) -> "PatternDatabase":
+        """Memory-map a database file written by ``save``."""
+        try:
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise PatternDatabaseMissing(
+                f"Pattern database {path} not found; "
+                "run 'python manage.py build_pattern_dbs'"
+            ) from None
+        magic, n_corners, corners, n_edges, edges = _HEADER.unpack_from(data)
+        if magic != cls.MAGIC:
+            raise ValueError(f"{path} is not a pattern database")
+        return cls(
+            name,
+            list(corners[:n_corners]),
+            list(edges[:n_edges]),
+            data=data,
+            offset=_HEADER.size,
+        )
+
+
+class _PieceGroup:
+    """The tracked corners or edges of a RankedPatternDatabase."""
+
+    def __init__(self, cubies: Tuple[int, ...], positions: int, twists: int):
+        self.cubies = cubies
+        self.positions = positions
+        self.twists = twists
+        # With every cubie of the kind tracked, orientations are read by
+        # position and the last one, fixed by the others, is left out
+        self.complete = len(cubies) == positions
+        self.digits = positions - 1 if self.complete else len(cubies)
+        self.permutations = math.perm(positions, len(cubies))
+        self.orientations = twists**self.digits
+        self._code_values: List[List[int]] = []
+        self._ranks: Optional[array.array] = None
+
+    def coordinates(self, codes: Sequence[int]) -> Tuple[int, int]:
+        """Return the permutation rank and orientation of the tracked cubies."""
+        if self._ranks is None:
+            self._build_lookup()
+        packed = sum(map(getitem, self._code_values, codes))
+        key, orientation = divmod(packed, self.orientations)
+        return self._ranks[key], orientation
+
+    def _build_lookup(self) -> None:
+        # Each cubie's code adds its share of two numbers, packed as
+        # key * orientations + orientation, so the search needs no Python
+        # loop per cubie: the key has the tracked cubies' positions as digits
+        # and indexes a table of permutation ranks (orderings of the tracked
+        # cubies' positions, in the order itertools.permutations lists them)
+        key_digits = self.positions - 1 if self.complete else len(self.cubies)
+        weights = [self.positions ** (key_digits - 1 - i) for i in range(key_digits)]
+        n_codes = self.positions * self.twists
+        code_values = [[0] * n_codes for _ in range(self.positions)]
+        for slot, cubie in enumerate(self.cubies):
+            for code in range(n_codes):
+                position, twist = divmod(code, self.twists)
+                value = 0
+                if slot < key_digits:
+                    value += position * weights[slot] * self.orientations
+                if not self.complete:
+                    value += twist * self.twists ** (self.digits - 1 - slot)
+                elif position < self.digits:
+                    value += twist * self.twists ** (self.digits - 1 - position)
+                code_values[cubie][code] = value
+
+        typecode = "H" if self.permutations <= 0xFFFF else "I"
+        ranks = array.array(typecode, [0]) * self.positions**key_digits
+        arrangements = itertools.permutations(range(self.positions), len(self.cubies))
+        for rank, arrangement in enumerate(arrangements):
+            ranks[sum(map(mul, arrangement, weights))] = rank
+        self._code_values = code_values
+        self._ranks = ranks
+
+    def turn(
+        self,
+        orientation: int,
+        targets: Sequence[int],
+        changes: Sequence[int],
+        twists_by_cubie: Sequence[int],
+    ) -> int:
+        """
+        Return an orientation after a move sending each position p to
+        ``targets[p]`` and twisting what it holds by ``changes[p]``.
+        ``twists_by_cubie`` is the twist each tracked cubie gets, which
+        depends on where it is (used unless the group is complete).
+        """
+        twists = self.twists
+        digits = []
+        for _ in range(self.digits):
+            orientation, digit = divmod(orientation, twists)
+            digits.append(digit)
+        digits.reverse()
+        if self.complete:
+            digits.append(-sum(digits) % twists)
+            by_position = [0] * self.positions
+            for position, twist in enumerate(digits):
+                by_position[targets[position]] = (twist + changes[position]) % twists
+            digits = by_position[:-1]
+        else:
+            digits = [(d + t) % twists for d, t in zip(digits, twists_by_cubie)]
+        for digit in digits:
+            orientation = orientation * twists + digit
+        return orientation
+
+
+class RankedPatternDatabase(PatternDatabase):
+    """
+    Distance table indexed by rank instead of by piece codes, so that it
+    has no unused entries and can cover far more pieces.
+
+    An entry is ``orientation * permutations + permutation``, where the
+    permutation is the rank of the tracked corners' and edges' positions
+    among all their arrangements, and the orientation their twists and
+    flips as base 3 and base 2 digits.
+    """
+
+    MAGIC = b"CUBEPDB2"
+
+    def __init__(
+        self,
+        name: str,
+        corners: Sequence[int],
+        edges: Sequence[int],
+        data: Optional[bytes | mmap.mmap] = None,
+        offset: int = 0,
+    ):
+        super().__init__(name, corners, edges, data, offset)
+        self._corners = _PieceGroup(self.corners, 8, 3)
+        self._edges = _PieceGroup(self.edges, 12, 2)
+        self.width = self._corners.permutations * self._edges.permutations
+        self.height = self._corners.orientations * self._edges.orientations
+        self.size = self.width * self.height
+
+    def index(self, corner_codes: Sequence[int], edge_codes: Sequence[int]) -> int:
+        corner_rank, corner_orientation = self._corners.coordinates(corner_codes)
+        edge_rank, edge_orientation = self._edges.coordinates(edge_codes)
+        orientation = corner_orientation * self._edges.orientations + edge_orientation
+        permutation = corner_rank * self._edges.permutations + edge_rank
+        return orientation * self.width + permutation
+
+    def build(self) -> None:
+        """
+        Fill the table by breadth-first search outward from the solved state.
+
+        The states of one orientation form a row, kept as an int with one
+        byte per permutation. A move sends each row to one or a few other
+        rows with its entries shuffled the same way, so a whole row moves
+        with a handful of C-level operations rather than a Python step per
+        state; the 88 million corner states take minutes instead of hours.
+        """
+        width, height = self.width, self.height
+        row_moves = self._row_moves()
+
+        seen = [0] * height
+        distances = [0] * height
+        frontier = [0] * height
+        row, column = divmod(self.index(SOLVED_CORNER_CODES, SOLVED_EDGE_CODES), width)
+        seen[row] = frontier[row] = 1 << (8 * column)
+        depth = 0
+        while True:
+            depth += 1
+            reached = [0] * height
+            for row, states in enumerate(frontier):
+                if not states:
+                    continue
+                states_bytes = states.to_bytes(width, "little")
+                for shuffle, targets in row_moves:
+                    moved = int.from_bytes(bytes(shuffle(states_bytes)), "little")
+                    for row_map, mask in targets:
+                        target = row if row_map is None else row_map[row]
+                        reached[target] |= moved if mask is None else moved & mask
+            frontier = [states & ~old for states, old in zip(reached, seen)]
+            if not any(frontier):
+                break
+            if depth >= UNKNOWN_DISTANCE:
+                raise ValueError(f"{self.name} is too deep to pack into 4 bits")
+            for row, states in enumerate(frontier):
+                if states:
+                    seen[row] |= states
+                    distances[row] += states * depth
+
+        # Arrangements no move sequence reaches (none unless every piece of
+        # both kinds is tracked, where permutation parity rules out half)
+        ones = int.from_bytes(b"\1" * width, "little")
+        table = b"".join(
+            (distance + (ones & ~old) * UNKNOWN_DISTANCE).to_bytes(width, "little")
+            for distance, old in zip(distances, seen)
+        )
+        if len(table) % 2:
+            table += bytes([UNKNOWN_DISTANCE])
+        low = int.from_bytes(table[0::2], "little")
+        high = int.from_bytes(table[1::2], "little")
+        # Every byte is below 16, so shifting the whole int moves each one
+        # into the high half of its own byte
+        self._data = (low | high << 4).to_bytes(len(table) // 2, "little")
+        self._offset = 0
+
+    def _row_moves(
+        self,
+    ) -> List[Tuple[itemgetter, List[Tuple[Optional[List[int]], Optional[int]]]]]:
+        """
+        For each move: a getter shuffling a row's bytes into the moved
+        permutations' places, and the rows that shuffled row goes to. Each is
+        a map from source to target row, and a mask of the permutations
+        going there when the pieces twist differently depending on where
+        they are.
+        """
+        corners, edges = self._corners, self._edges
+        n_corners = len(self.corners)
+        # Positions of the tracked pieces for every permutation, in rank
+        # order: corners as 0-7 and edges as 8-19
+        arrangements = [
+            corner_positions + edge_positions
+            for corner_positions in itertools.permutations(range(8), n_corners)
+            for edge_positions in itertools.permutations(
+                range(8, 20), len(edges.cubies)
+            )
+        ]
+        ranks = {arrangement: rank for rank, arrangement in enumerate(arrangements)}
+        columns = list(range(self.width))
+        # Slots of arrangements whose cubies' twists decide the new orientation
+        partial = [
+            slot
+            for slot in range(len(arrangements[0]))
+            if not (corners if slot < n_corners else edges).complete
+        ]
+
+        row_moves = []
+        for corner_moves, edge_moves in zip(CORNER_CODE_MOVES, EDGE_CODE_MOVES):
+            targets = [corner_moves[p * 3] // 3 for p in range(8)] + [
+                8 + edge_moves[p * 2] // 2 for p in range(12)
+            ]
+            changes = [corner_moves[p * 3] % 3 for p in range(8)] + [
+                edge_moves[p * 2] % 2 for p in range(12)
+            ]
+            twisting = any(
+                changes[p]
+                for slot in partial
+                for p in (range(8) if slot < n_corners else range(8, 20))
+            )
+
+            inverse = [0] * self.width
+            masks: Dict[Tuple[int, ...], bytearray] = {}
+            for column, arrangement in enumerate(arrangements):
+                moved = ranks[tuple(map(targets.__getitem__, arrangement))]
+                inverse[moved] = columns[column]
+                if twisting:
+                    key = tuple(changes[arrangement[slot]] for slot in partial)
+                    mask = masks.get(key)
+                    if mask is None:
+                        mask = masks[key] = bytearray(self.width)
+                    mask[moved] = 1
+            if not masks:
+                masks[(0,) * len(partial)] = bytearray()
+
+            row_targets = []
+            for key, mask in masks.items():
+                twists_by_cubie = dict(zip(partial, key))
+                corner_map = [
+                    corners.turn(
+                        orientation,
+                        targets[:8],
+                        changes[:8],
+                        [twists_by_cubie.get(slot, 0) for slot in range(n_corners)],
+                    )
+                    for orientation in range(corners.orientations)
+                ]
+                edge_map = [
+                    edges.turn(
+                        orientation,
+                        [target - 8 for target in targets[8:]],
+                        changes[8:],
+                        [
+                            twists_by_cubie.get(slot, 0)
+                            for slot in range(n_corners, len(arrangements[0]))
+                        ],
+                    )
+                    for orientation in range(edges.orientations)
+                ]
+                row_map = [
+                    corner_map[row // edges.orientations] * edges.orientations
+                    + edge_map[row % edges.orientations]
+                    for row in range(self.height)
+                ]
+                row_targets.append(
+                    (
+                        None if row_map == list(range(self.height)) else row_map,
+                        int.from_bytes(mask, "little") if len(masks) > 1 else None,
+                    )
+                )
+            row_moves.append((itemgetter(*inverse), row_targets))
+        return row_moves
+
+
+# Databases used by the optimal solver, as in Korf's optimal solver: all
+# eight corners, and the edges in two groups of six.
+PATTERN_DATABASES: Dict[str, Tuple[Tuple[int, ...], Tuple[int, ...]]] = {
+    "corners": ((0, 1, 2, 3, 4, 5, 6, 7), ()),
+    "edges_a": ((), (0, 1, 2, 3, 4, 5)),
+    "edges_b": ((), (6, 7, 8, 9, 10, 11)),
+}
+
+# Databases used by the CFOP solver's F2L search (edges_d, below, doubles as
+# its cross table): each F2L pair, a D layer corner and the middle layer edge
+# of its slot, together with one of the two cross edges beside that slot.
+F2L_PATTERN_DATABASES: Dict[str, Tuple[Tuple[int, ...], Tuple[int, ...]]] = {
+    "f2l_fr_dr": ((4,), (8, 4)),
+    "f2l_fr_df": ((4,), (8, 5)),
+    "f2l_fl_df": ((5,), (9, 5)),
+    "f2l_fl_dl": ((5,), (9, 6)),
+    "f2l_bl_dl": ((6,), (10, 6)),
+    "f2l_bl_db": ((6,), (10, 7)),
+    "f2l_br_db": ((7,), (11, 7)),
+    "f2l_br_dr": ((7,), (11, 4)),
+}
+
+# Every database of the CFOP solver, which indexes them by piece codes: the
+# cross (the four D layer edges) and the F2L pairs.
+CFOP_PATTERN_DATABASES: Dict[str, Tuple[Tuple[int, ...], Tuple[int, ...]]] = {
+    "edges_d": ((), (4, 5, 6, 7)),
+    **F2L_PATTERN_DATABASES,
+}
+
+_loaded: Dict[str, PatternDatabase] = {}
+
+
+def pattern_db_path(name: str) -> Path:
+    return Path(settings.PATTERN_DB_DIR) / f"{name}.pdb"
+
+
+def pattern_database_class(name: str) -> type[PatternDatabase]:
+    """The optimal solver's databases are ranked; the CFOP ones use codes."""
+    return RankedPatternDatabase if name in PATTERN_DATABASES else PatternDatabase
+
+
+def get_pattern_database(name: str) -> PatternDatabase:
+    """Return a memory-mapped pattern database, opening it on first use."""
+    database = _loaded.get(name)
+    if database is None:
+        database = _loaded[name] = pattern_database_class(name).open(
+            name, pattern_db_path(name)
+        )
+    return database
@@ -0,0 +1,282 @@
+"""
+2x2 ("pocket") cube support.
+
+A 2x2 is the corners of a 3x3, so it reuses the corner model from cube.py.
+Facelet strings have 24 characters: U(0-3), R(4-7), F(8-11), D(12-15),
+L(16-19), B(20-23), each face read row by row like the 3x3 faces.
+
+With the DBL corner held fixed, U, R and F turns reach all 7! * 3^6 =
+3,674,160 states. ``manage.py build_2x2_table`` stores the exact distance to
+solved for every one of them, packed two per byte; solving walks downhill
+through the memory-mapped table, which gives optimal solutions without
+searching.
+"""
+
+import mmap
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from .cube import CORNER_COLORS, CORNER_FACELETS, FACELET_MOVES, MOVES, multiply
+from .pattern import PatternDatabaseMissing
+
+SOLVED_FACELETS_2X2: str = "".join(face * 4 for face in "URFDLB")
+
+MOVE_NAMES_2X2: Tuple[str, ...] = ("U", "U2", "U'", "R", "R2", "R'", "F", "F2", "F'")
+
+_OPPOSITE: Dict[str, str] = {"U": "D", "D": "U", "R": "L", "L": "R", "F": "B", "B": "F"}
+
+# Corner positions other than DBL (6), which never moves
+_FREE_POSITIONS: Tuple[int, ...] = (0, 1, 2, 3, 4, 5, 7)
+
+N_PERMUTATIONS = 5040  # 7!
+N_ORIENTATIONS = 729  # 3^6
+N_STATES = N_PERMUTATIONS * N_ORIENTATIONS
+
+_MAGIC = b"CUBE2X2D"
+_UNKNOWN = 15
+
+
+def _to_2x2_index(index_3x3: int) -> int:
+    face, offset = divmod(index_3x3, 9)
+    row, col = divmod(offset, 3)
+    return face * 4 + (row // 2) * 2 + col // 2
+
+
+CORNER_FACELETS_2X2: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(_to_2x2_index(i) for i in corner) for corner in CORNER_FACELETS
+)
+
+# Facelet permutation of each move on a 24-character state
+FACELET_MOVES_2X2: Dict[str, Tuple[int, ...]] = {}
+for _name, _perm in FACELET_MOVES.items():
+    _moved = [0] * 24
+    for _corner in CORNER_FACELETS:
+        for _i in _corner:
+            _moved[_to_2x2_index(_i)] = _to_2x2_index(_perm[_i])
+    FACELET_MOVES_2X2[_name] = tuple(_moved)
+
+
+def apply_moves_2x2(facelet_string: str, moves: List[str]) -> str:
+    """Apply a sequence of face turns to a 24-character facelet string."""
+    state = facelet_string
+    for move in moves:
+        perm = FACELET_MOVES_2X2[move]
+        state = "".join(state[p] for p in perm)
+    return state
+
+
+def is_solved_2x2(facelet_string: str) -> bool:
+    """A 2x2 is solved when every face shows one color, in any orientation."""
+    return all(len(set(facelet_string[i : i + 4])) == 1 for i in range(0, 24, 4))
+
+
+def _rank_permutation(perm: List[int]) -> int:
+    rank = 0
+    remaining = sorted(perm)
+    for value in perm:
+        i = remaining.index(value)
+        rank = rank * len(remaining) + i
+        remaining.pop(i)
+    return rank
+
+
+def _unrank_permutation(rank: int, n: int) -> List[int]:
+    digits = []
+    for base in range(1, n + 1):
+        rank, digit = divmod(rank, base)
+        digits.append(digit)
+    remaining = list(range(n))
+    return [remaining.pop(d) for d in reversed(digits)]
+
+
+def _encode(cp: Tuple[int, ...], co: Tuple[int, ...]) -> int:
+    perm = [_FREE_POSITIONS.index(cp[p]) for p in _FREE_POSITIONS]
+    ori = 0
+    for p in _FREE_POSITIONS[:6]:
+        ori = ori * 3 + co[p]
+    return _rank_permutation(perm) * N_ORIENTATIONS + ori
+
+
+def _decode(index: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    perm_rank, ori = divmod(index, N_ORIENTATIONS)
+    cp = list(range(8))
+    for p, i in zip(_FREE_POSITIONS, _unrank_permutation(perm_rank, 7)):
+        cp[p] = _FREE_POSITIONS[i]
+    co = [0] * 8
+    for p in reversed(_FREE_POSITIONS[:6]):
+        ori, co[p] = divmod(ori, 3)
+    co[7] = -sum(co) % 3
+    return tuple(cp), tuple(co)
+
+
+def _build_move_tables() -> Tuple[List[int], List[int]]:
+    # Permutation and orientation coordinates move independently, so each
+    # gets its own small table, indexed by coordinate * 9 + move.
+    moves = [MOVES[name] for name in MOVE_NAMES_2X2]
+    solved_edges = (tuple(range(12)), (0,) * 12)
+
+    perm_table = [0] * (N_PERMUTATIONS * len(moves))
+    for perm_rank in range(N_PERMUTATIONS):
+        cp, _ = _decode(perm_rank * N_ORIENTATIONS)
+        for m, move in enumerate(moves):
+            new_cp = multiply((cp, (0,) * 8) + solved_edges, move)[0]
+            perm_table[perm_rank * 9 + m] = _encode(new_cp, (0,) * 8) // N_ORIENTATIONS
+
+    ori_table = [0] * (N_ORIENTATIONS * len(moves))
+    for ori in range(N_ORIENTATIONS):
+        _, co = _decode(ori)
+        for m, move in enumerate(moves):
+            new_co = multiply((tuple(range(8)), co) + solved_edges, move)[1]
+            ori_table[ori * 9 + m] = _encode(tuple(range(8)), new_co)
+    return perm_table, ori_table
+
+
+_move_tables: Optional[Tuple[List[int], List[int]]] = None
+
+
+def _get_move_tables() -> Tuple[List[int], List[int]]:
+    global _move_tables
+    if _move_tables is None:
+        _move_tables = _build_move_tables()
+    return _move_tables
+
+
+def build_distance_table(max_depth: Optional[int] = None) -> bytes:
+    """
+    Breadth-first search over all states; returns the packed table.
+
+    ``max_depth`` stops the search early, leaving farther states unknown
+    (only useful for tests; the solver needs the complete table).
+    """
+    perm_table, ori_table = _get_move_tables()
+    distances = bytearray([_UNKNOWN]) * N_STATES
+    distances[0] = 0
+    frontier = [0]
+    depth = 0
+    while frontier and depth != max_depth:
+        depth += 1
+        next_frontier = []
+        for index in frontier:
+            perm9, ori = divmod(index, N_ORIENTATIONS)
+            perm9 *= 9
+            ori *= 9
+            for m in range(9):
+                moved = perm_table[perm9 + m] * N_ORIENTATIONS + ori_table[ori + m]
+                if distances[moved] == _UNKNOWN:
+                    distances[moved] = depth
+                    next_frontier.append(moved)
+        frontier = next_frontier
+
+    packed = bytearray(N_STATES // 2)
+    packed[:] = bytes(a | (b << 4) for a, b in zip(distances[::2], distances[1::2]))
+    return _MAGIC + bytes(packed)
+
+
+def distance_table_path() -> Path:
+    return Path(settings.PATTERN_DB_DIR) / "pocket.dist"
+
+
+def save_distance_table(data: bytes, path: Path) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+_table: Optional[mmap.mmap] = None
+
+
+def _get_table() -> mmap.mmap:
+    global _table
+    if _table is None:
+        path = distance_table_path()
+        try:
+            with open(path, "rb") as f:
+                table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise PatternDatabaseMissing(
+                f"2x2 distance table {path} not found; "
+                "run 'python manage.py build_2x2_table'"
+            ) from None
+        if table[: len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{path} is not a 2x2 distance table")
+        _table = table
+    return _table
+
+
+def _distance(table: mmap.mmap, index: int) -> int:
+    byte = table[len(_MAGIC) + (index >> 1)]
+    return (byte >> ((index & 1) << 2)) & 0xF
+
+
+def facelets_to_corners(facelet_string: str) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """
+    Convert a 24-character facelet string to corner permutation/orientation,
+    viewed with the DBL corner in its home position.
+
+    Raises ValueError if the string does not describe a solvable 2x2.
+    """
+    if len(facelet_string) != 24:
+        raise ValueError("Facelet string must have 24 characters")
+
+    # The DBL corner is never turned, so its stickers define which color
+    # belongs on D, B and L, and their opposites on U, F and R.
+    dbl_colors = [facelet_string[i] for i in CORNER_FACELETS_2X2[6]]
+    if len({_OPPOSITE.get(c, c) for c in dbl_colors} | set(dbl_colors)) != 6:
+        raise ValueError("Invalid corner colors: " + "".join(dbl_colors))
+    recolor = {}
+    for color, face in zip(dbl_colors, "DBL"):
+        recolor[color] = face
+        recolor[_OPPOSITE[color]] = _OPPOSITE[face]
+    facelets = "".join(recolor[c] for c in facelet_string)
+
+    cp: List[int] = []
+    co: List[int] = []
+    for slot in CORNER_FACELETS_2X2:
+        for ori in range(3):
+            if facelets[slot[ori]] in "UD":
+                break
+        else:
+            raise ValueError("Corner without a U or D sticker")
+        colors = "".join(facelets[slot[(ori + n) % 3]] for n in range(3))
+        if colors not in CORNER_COLORS:
+            raise ValueError(f"Invalid corner colors: {colors}")
+        cp.append(CORNER_COLORS.index(colors))
+        co.append(ori)
+
+    if len(set(cp)) != 8:
+        raise ValueError("Some corners appear more than once")
+    if sum(co) % 3:
+        raise ValueError("Twisted corner")
+    return tuple(cp), tuple(co)
+
+
+def solve_2x2(facelet_string: str) -> List[str]:
+    """
+    Return an optimal solution for a 2x2 facelet string.
+
+    Raises ValueError for unsolvable states and PatternDatabaseMissing if the
+    distance table has not been built.
+    """
+    cp, co = facelets_to_corners(facelet_string)
+    table = _get_table()
+    perm_table, ori_table = _get_move_tables()
+
+    index = _encode(cp, co)
+    distance = _distance(table, index)
+    solution: List[str] = []
+    while distance:
+        perm9, ori = divmod(index, N_ORIENTATIONS)
+        for m, name in enumerate(MOVE_NAMES_2X2):
+            moved = perm_table[perm9 * 9 + m] * N_ORIENTATIONS + ori_table[ori * 9 + m]
+            if _distance(table, moved) == distance - 1:
+                solution.append(name)
+                index = moved
+                distance -= 1
+                break
+        else:
+            raise ValueError("Corrupt 2x2 distance table")
+    return solution
@@ -0,0 +1,60 @@
+"""
+Process pool for solving many cube states at once.
+
+kociemba.solve holds the GIL, so batches are spread across worker processes.
+The pool is created lazily and shared by everything in the current process.
+It is meant for management commands: the prefork web workers are
+multi-threaded, and forking them could copy a lock another thread holds, so
+requests solve their (bounded) batches inline with ``solve_inline``.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+
+from . import solution_cache
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Return the shared solver pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        workers = getattr(settings, "SOLVER_POOL_SIZE", None) or os.cpu_count() or 1
+        _pool = ProcessPoolExecutor(max_workers=workers)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the shared solver pool, if it was started."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+def solve_many(facelet_strings: Iterable[str], chunksize: int = 16) -> List[str]:
+    """
+    Solve a batch of facelet strings with kociemba, preserving order.
+
+    Unsolvable states come back as "Error", matching kociemba.solve.
+    """
+    facelet_strings = list(facelet_strings)
+    if len(facelet_strings) <= 1:
+        return solve_inline(facelet_strings)
+    return list(get_pool().map(_solve_one, facelet_strings, chunksize=chunksize))
+
+
+def solve_inline(facelet_strings: Iterable[str]) -> List[str]:
+    """``solve_many`` in the current process and thread."""
+    return [_solve_one(f) for f in facelet_strings]
+
+
+def _solve_one(facelet_string: str) -> str:
+    try:
+        return solution_cache.solve(facelet_string)
+    except ValueError:
+        return "Error"
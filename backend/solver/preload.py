@@ -0,0 +1,57 @@
+"""
+Loads solver state ahead of the first request.
+
+The prefork launcher in main.py calls ``preload`` once in the parent
+process, so every forked worker starts with kociemba's tables, the move
+tables, the memory-mapped lookup tables and the shared solution cache
+already in place, sharing those pages copy-on-write instead of each
+building its own copy.
+"""
+
+import mmap
+from typing import List
+
+import kociemba
+
+from . import pocket
+from .cfop import get_case_tables
+from .pattern import (
+    CFOP_PATTERN_DATABASES,
+    PATTERN_DATABASES,
+    PatternDatabaseMissing,
+    get_pattern_database,
+)
+from .solution_cache import get_solution_cache
+
+# Any solvable state; the first kociemba.solve call loads its pruning tables
+_WARMUP_STATE = "DRLUUBFBRBLURRLRUBLRDDFDLFUFUFFDBRDUBRUFLLFDDBFLUBLRBD"
+
+
+def preload() -> List[str]:
+    """Load everything the solvers need; returns the names of what was loaded."""
+    kociemba.solve(_WARMUP_STATE)
+    loaded = ["kociemba"]
+
+    for name in (*PATTERN_DATABASES, *CFOP_PATTERN_DATABASES):
+        try:
+            get_pattern_database(name).prefetch()
+        except PatternDatabaseMissing:
+            continue
+        loaded.append(f"pattern database {name}")
+
+    pocket._get_move_tables()
+    try:
+        table = pocket._get_table()
+    except PatternDatabaseMissing:
+        pass
+    else:
+        if hasattr(mmap, "MADV_WILLNEED"):
+            table.madvise(mmap.MADV_WILLNEED)
+        loaded.append("2x2 distance table")
+
+    get_case_tables()
+    loaded.append("CFOP case tables")
+
+    if get_solution_cache() is not None:
+        loaded.append("solution cache")
+    return loaded
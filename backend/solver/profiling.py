@@ -0,0 +1,239 @@
+"""
+On-demand request profiling.
+
+Staff users switch profiling on through /profiling/ for the next N requests
+to chosen path prefixes, or for a sampled fraction of them. Each profiled
+request is run under cProfile (and optionally tracemalloc), and the results
+are written to PROFILING_DIR for the summary view or offline analysis with
+pstats / tracemalloc.
+
+The switch is a small file in PROFILING_DIR, there only while profiling is
+on, so turning profiling on or off through any worker process applies to
+all of them, and the request budget is counted down under a file lock
+shared by every worker. While profiling is off the middleware costs one
+failed open() per request.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: the request budget is exact per process only
+    fcntl = None
+
+
+# The switch, in PROFILING_DIR, and the lock file serializing its updates
+SWITCH_FILE = "switch.json"
+SWITCH_LOCK_FILE = "switch.lock"
+
+_OFF: Dict[str, object] = {
+    "active": False,
+    "paths": [],
+    "remaining": None,
+    "sample_rate": 1.0,
+    "memory": False,
+}
+
+
+class RequestProfiler:
+    def __init__(self):
+        # fcntl locks belong to the whole process, so threads also need one
+        self._lock = threading.Lock()
+        # Profiled requests run one at a time so tracemalloc data is not
+        # mixed between concurrent requests.
+        self._capture_lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return bool(self._read()["active"])
+
+    def enable(
+        self,
+        paths: Sequence[str],
+        requests: Optional[int] = None,
+        sample_rate: float = 1.0,
+        memory: bool = False,
+    ) -> None:
+        """
+        Profile requests whose path starts with one of ``paths`` (all paths
+        if empty), for at most ``requests`` requests, each one picked with
+        probability ``sample_rate``.
+        """
+        with self._locked():
+            self._write(
+                {
+                    "active": requests is None or requests > 0,
+                    "paths": list(paths),
+                    "remaining": requests,
+                    "sample_rate": sample_rate,
+                    "memory": memory,
+                }
+            )
+
+    def disable(self) -> None:
+        with self._locked():
+            self._write(_OFF)
+
+    def status(self) -> Dict[str, object]:
+        return self._read()
+
+    def claim(self, path: str) -> Optional[Dict[str, object]]:
+        """
+        Decide whether to profile a request, counting it if so; returns the
+        switch it is profiled under, or None.
+        """
+        switch = self._read()
+        if not switch["active"]:
+            return None
+        paths = switch["paths"]
+        if paths and not any(path.startswith(p) for p in paths):
+            return None
+        if switch["sample_rate"] < 1.0 and random.random() >= switch["sample_rate"]:
+            return None
+        if switch["remaining"] is None:
+            return switch
+        # Counted down under the lock, so N requests are profiled in total
+        # however many workers serve them
+        with self._locked():
+            switch = self._read()
+            if not switch["active"] or switch["remaining"] is None:
+                return switch if switch["active"] else None
+            remaining = switch["remaining"] - 1
+            self._write({**switch, "remaining": remaining, "active": remaining > 0})
+        return switch
+
+    def _read(self) -> Dict[str, object]:
+        try:
+            with open(Path(settings.PROFILING_DIR) / SWITCH_FILE) as f:
+                return {**_OFF, **json.load(f)}
+        except (FileNotFoundError, ValueError):
+            return dict(_OFF)
+
+    def _write(self, switch: Dict[str, object]) -> None:
+        path = Path(settings.PROFILING_DIR) / SWITCH_FILE
+        if not switch["active"]:
+            path.unlink(missing_ok=True)
+            return
+        # Replaced rather than rewritten, so readers never see half a file
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(switch, f)
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the switch for an update, against every worker process."""
+        directory = Path(settings.PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(directory / SWITCH_LOCK_FILE, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.lockf(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def capture(self, request, get_response, memory: bool = False):
+        with self._capture_lock:
+            trace_memory = memory and not tracemalloc.is_tracing()
+            if trace_memory:
+                tracemalloc.start()
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            try:
+                response = profile.runcall(get_response, request)
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                snapshot = tracemalloc.take_snapshot() if trace_memory else None
+                if trace_memory:
+                    tracemalloc.stop()
+                self._save(request.path, elapsed_ms, profile, snapshot)
+        return response
+
+    def _save(self, path, elapsed_ms, profile, snapshot) -> None:
+        directory = Path(settings.PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        slug = path.strip("/").replace("/", "-") or "root"
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**9:09d}-{slug}"
+        profile.dump_stats(directory / f"{stem}.prof")
+        if snapshot is not None:
+            snapshot.dump(str(directory / f"{stem}.tracemalloc"))
+        print(f"Profiled {path} in {elapsed_ms:.2f} ms -> {stem}")
+
+
+profiler = RequestProfiler()
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        switch = profiler.claim(request.path)
+        if switch is not None:
+            return profiler.capture(request, self.get_response, switch["memory"])
+        return self.get_response(request)
+
+
+def summarize(path_filter: str = "", limit: Optional[int] = None) -> Dict[str, object]:
+    """
+    Combine saved profiles into the top functions by cumulative time and the
+    top allocation sites by size.
+    """
+    limit = limit or settings.PROFILING_TOP_N
+    directory = Path(settings.PROFILING_DIR)
+    pattern = "*" + path_filter.strip("/").replace("/", "-")
+    if not pattern.endswith("*"):
+        pattern += "*"
+    profiles, snapshots = [], []
+    if directory.exists():
+        profiles = sorted(directory.glob(f"{pattern}.prof"))
+        snapshots = sorted(directory.glob(f"{pattern}.tracemalloc"))
+
+    functions = []
+    if profiles:
+        stats = pstats.Stats(str(profiles[0]), stream=io.StringIO())
+        for extra in profiles[1:]:
+            stats.add(str(extra))
+        entries = sorted(
+            stats.stats.items(), key=lambda item: item[1][3], reverse=True
+        )[:limit]
+        for (filename, line, name), (_, calls, total, cumulative, _) in entries:
+            functions.append(
+                {
+                    "function": f"{filename}:{line}({name})",
+                    "calls": calls,
+                    "total_ms": round(total * 1000, 3),
+                    "cumulative_ms": round(cumulative * 1000, 3),
+                }
+            )
+
+    allocations: Dict[str, List[int]] = {}
+    for snapshot_file in snapshots:
+        snapshot = tracemalloc.Snapshot.load(str(snapshot_file))
+        for stat in snapshot.statistics("lineno"):
+            site = str(stat.traceback)
+            size_count = allocations.setdefault(site, [0, 0])
+            size_count[0] += stat.size
+            size_count[1] += stat.count
+    top_allocations = sorted(allocations.items(), key=lambda i: i[1][0], reverse=True)
+
+    return {
+        "profiles": len(profiles),
+        "snapshots": len(snapshots),
+        "functions": functions,
+        "allocations": [
+            {"site": site, "size_bytes": size, "blocks": count}
+            for site, (size, count) in top_allocations[:limit]
+        ],
+    }
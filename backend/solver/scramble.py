@@ -0,0 +1,36 @@
+"""
+Bulk generation of uniformly random cube states and scramble sequences.
+"""
+
+from typing import Dict, List, Optional, Union
+
+from .cube import invert_moves, random_states, state_to_facelets
+from .pool import solve_inline, solve_many
+
+
+def generate_scrambles(
+    count: int,
+    with_sequences: bool = False,
+    seed: Optional[int] = None,
+    use_pool: bool = False,
+) -> List[Dict[str, Union[str, List[str]]]]:
+    """
+    Generate ``count`` uniformly random states as facelet strings.
+
+    With ``with_sequences`` each state also gets a scramble: the inverse of its
+    kociemba solution, which takes a solved cube to that state. ``use_pool``
+    spreads those solves over the process pool; web requests leave it off,
+    since forking a multi-threaded server process is unsafe.
+    """
+    facelet_strings = [state_to_facelets(s) for s in random_states(count, seed)]
+    scrambles: List[Dict[str, Union[str, List[str]]]] = [
+        {"facelet_string": f} for f in facelet_strings
+    ]
+
+    if with_sequences:
+        solver = solve_many if use_pool else solve_inline
+        solutions = solver(facelet_strings)
+        for scramble, solution in zip(scrambles, solutions):
+            scramble["scramble"] = invert_moves(solution.split())
+
+    return scrambles
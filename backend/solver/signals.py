@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .events import broadcaster
+from .models import CubeSolve
+
+
+@receiver(post_save, sender=CubeSolve)
+def publish_new_solve(sender, instance: CubeSolve, created: bool, **kwargs):
+    """Push newly created solves to live history streams once committed."""
+    if created:
+        transaction.on_commit(broadcaster.publish)
@@ -0,0 +1,207 @@
+"""
+kociemba solutions shared by every process on a host.
+
+Web workers, solver pool processes and solve_workers each solve cubes in
+their own process, so an in-process memo only helps the process that filled
+it. This cache instead lives in a memory-mapped file (SOLUTION_CACHE_PATH):
+a fixed-size, open-addressed hash table that all of them read before calling
+``kociemba.solve``.
+
+Each slot holds a sequence number, when it was written, the facelet string
+packed into 18 bytes (as a base-6 number) and the solution, one byte per
+move. Reads take no lock: a writer makes the slot's sequence number odd
+while it rewrites the slot and even again afterwards, and a reader that sees
+an odd or changed sequence number treats the slot as a miss. Writers take an
+fcntl lock on the file. A state is only ever looked for in the PROBE_LIMIT
+slots after its hash; when those are all taken, the oldest entry among them
+is replaced, so neither lookups nor evictions scan more than that.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import kociemba
+from django.conf import settings
+
+from .cube import MOVE_NAMES
+
+try:
+    import fcntl
+except ImportError:  # Windows: the cache is disabled
+    fcntl = None
+
+PROBE_LIMIT = 8
+MAX_MOVES = 37
+FACELET_COUNT = 54
+
+_MAGIC = b"CUBESC01"
+_HEADER = struct.Struct("<8sII")
+_HEADER_SIZE = 64
+# sequence, written at (seconds), packed facelets, move count, moves
+_SLOT = struct.Struct(f"<II18sB{MAX_MOVES}s")
+_SEQUENCE = struct.Struct("<I")
+
+_FACELET_DIGITS = str.maketrans("URFDLB", "012345")
+_MOVE_CODES: Dict[str, int] = {name: code for code, name in enumerate(MOVE_NAMES)}
+
+
+def pack_facelets(facelet_string: str) -> bytes:
+    """Pack a 54-character facelet string into 18 bytes."""
+    if len(facelet_string) != FACELET_COUNT:
+        raise ValueError("Facelet string must have 54 characters")
+    return int(facelet_string.translate(_FACELET_DIGITS), 6).to_bytes(18, "little")
+
+
+class SolutionCache:
+    """Open-addressed table of solutions in a shared, memory-mapped file."""
+
+    def __init__(self, fd: int, data: mmap.mmap, slots: int):
+        self._fd = fd
+        self._data = data
+        self.slots = slots
+        # fcntl locks belong to the whole process, so threads also need one
+        self._thread_lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: Path, slots: int) -> "SolutionCache":
+        """Map the cache file, creating it (or resetting a mismatched one)."""
+        if slots < 1:
+            raise ValueError("SOLUTION_CACHE_SLOTS must be positive")
+        size = _HEADER_SIZE + slots * _SLOT.size
+        header = _HEADER.pack(_MAGIC, slots, _SLOT.size)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+            try:
+                if os.pread(fd, _HEADER.size, 0) != header:
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, size)
+                    os.pwrite(fd, header, 0)
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+            data = mmap.mmap(fd, size)
+        except BaseException:
+            os.close(fd)
+            raise
+        return cls(fd, data, slots)
+
+    def close(self) -> None:
+        self._data.close()
+        os.close(self._fd)
+
+    def _offsets(self, key: bytes) -> Iterator[int]:
+        start = zlib.crc32(key)
+        for probe in range(min(PROBE_LIMIT, self.slots)):
+            yield _HEADER_SIZE + (start + probe) % self.slots * _SLOT.size
+
+    def get(self, facelet_string: str) -> Optional[str]:
+        """Return the cached solution for a state, or None."""
+        try:
+            key = pack_facelets(facelet_string)
+        except ValueError:
+            return None
+        data = self._data
+        for offset in self._offsets(key):
+            (sequence,) = _SEQUENCE.unpack_from(data, offset)
+            if not sequence:
+                # Slots are never emptied, so the state cannot be further on
+                return None
+            _, _, slot_key, length, moves = _SLOT.unpack_from(data, offset)
+            if slot_key != key:
+                continue
+            if sequence & 1 or _SEQUENCE.unpack_from(data, offset)[0] != sequence:
+                # Caught mid-write; a miss is always safe
+                return None
+            return " ".join(MOVE_NAMES[code] for code in moves[:length])
+        return None
+
+    def put(self, facelet_string: str, solution: str) -> bool:
+        """Store a solution; returns False if it cannot be cached."""
+        moves = solution.split()
+        try:
+            key = pack_facelets(facelet_string)
+            encoded = bytes(_MOVE_CODES[move] for move in moves)
+        except (KeyError, ValueError):
+            return False
+        if len(encoded) > MAX_MOVES:
+            return False
+
+        data = self._data
+        with self._write_lock():
+            target: Optional[Tuple[int, int]] = None
+            for offset in self._offsets(key):
+                sequence, written_at, slot_key, _, _ = _SLOT.unpack_from(data, offset)
+                if not sequence or slot_key == key:
+                    target = (offset, sequence)
+                    break
+                if target is None or written_at < oldest:
+                    target, oldest = (offset, sequence), written_at
+            offset, sequence = target
+            # Odd while writing, even if a writer died with the slot still odd
+            start = sequence | 1
+            _SEQUENCE.pack_into(data, offset, start)
+            _SLOT.pack_into(
+                data,
+                offset,
+                start,
+                int(time.time()) & 0xFFFFFFFF,
+                key,
+                len(encoded),
+                encoded,
+            )
+            # Never wrap back to 0, which marks an empty slot
+            _SEQUENCE.pack_into(data, offset, (start + 1) & 0xFFFFFFFF or 2)
+        return True
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        with self._thread_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+
+_opened: Dict[Tuple[str, int], Optional[SolutionCache]] = {}
+
+
+def get_solution_cache() -> Optional[SolutionCache]:
+    """Return this process's handle on the shared cache, or None if disabled."""
+    path = settings.SOLUTION_CACHE_PATH
+    if not path or fcntl is None:
+        return None
+    key = (str(path), settings.SOLUTION_CACHE_SLOTS)
+    if key not in _opened:
+        try:
+            _opened[key] = SolutionCache.open(Path(path), key[1])
+        except OSError as e:
+            print(f"Solution cache {path} is unavailable: {e}")
+            _opened[key] = None
+    return _opened[key]
+
+
+def lookup(facelet_string: str) -> Optional[str]:
+    """Return the cached kociemba solution for a state, or None."""
+    cache = get_solution_cache()
+    return cache.get(facelet_string) if cache is not None else None
+
+
+def solve(facelet_string: str) -> str:
+    """``kociemba.solve``, answered from the shared cache when possible."""
+    cache = get_solution_cache()
+    if cache is not None:
+        solution = cache.get(facelet_string)
+        if solution is not None:
+            return solution
+    solution = kociemba.solve(facelet_string)
+    if cache is not None and solution != "Error":
+        cache.put(facelet_string, solution)
+    return solution
@@ -0,0 +1,162 @@
+"""
+The solve path shared by /solve/ and ``manage.py solve_worker``.
+
+``solve`` picks the solver for a mode, answers states solved before from
+the shared solution cache or the CubeState table, and turns every solver
+failure into a SolveFailed carrying the HTTP status to report.
+"""
+
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+from .cfop import solve_cfop
+from .cube import SOLVED_FACELETS
+from .models import CubeSolve, CubeState
+from .optimal import SearchLimitExceeded, solve_optimal
+from .pattern import PatternDatabaseMissing
+from .pocket import SOLVED_FACELETS_2X2, solve_2x2
+from . import solution_cache
+
+# How each mode's solver is named in error messages
+SOLVER_NAMES = {
+    CubeState.KOCIEMBA: "Kociemba",
+    CubeState.OPTIMAL: "Optimal",
+    CubeState.CFOP: "CFOP",
+}
+
+
+class SolveFailed(Exception):
+    """A cube that could not be solved; ``status`` is the HTTP status to report."""
+
+    def __init__(self, message: str, status: int, details: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+
+class Solution(NamedTuple):
+    mode: str
+    moves: List[str]
+    solve_time_ms: float
+    # Looked up rather than worked out
+    cached: bool
+    # CFOP stages, for mode="cfop"
+    stages: Optional[List[Dict[str, object]]] = None
+
+
+def known_solution(facelet_string: str, mode: str) -> Optional[str]:
+    """Return the stored solution for a previously solved state, if any."""
+    if mode == CubeState.KOCIEMBA:
+        solution = solution_cache.lookup(facelet_string)
+        if solution is not None:
+            return solution
+    if mode == CubeState.CFOP:
+        # CFOP stages are not stored, so they are always worked out
+        return None
+    try:
+        return (
+            CubeState.objects.filter(facelet_string=facelet_string, mode=mode)
+            .values_list("solution", flat=True)
+            .first()
+        )
+    except Exception as db_error:
+        print(f"Failed to look up cube state: {db_error}")
+        return None
+
+
+def _work_out(
+    facelet_string: str,
+    mode: str,
+    max_nodes: Optional[int],
+    time_limit: Optional[float],
+) -> Tuple[str, Optional[List[Dict[str, object]]]]:
+    """Run the solver for ``mode``; returns the solution and any CFOP stages."""
+    if len(facelet_string) == len(SOLVED_FACELETS_2X2):
+        return " ".join(solve_2x2(facelet_string)), None
+    if mode == CubeState.OPTIMAL:
+        nodes_cap = settings.OPTIMAL_SOLVER_MAX_NODES
+        if max_nodes is not None:
+            nodes_cap = min(max_nodes, nodes_cap)
+        time_cap = settings.OPTIMAL_SOLVER_TIME_LIMIT
+        if time_limit is not None:
+            time_cap = min(time_limit, time_cap)
+        return " ".join(solve_optimal(facelet_string, nodes_cap, time_cap)), None
+    if mode == CubeState.CFOP:
+        stages = solve_cfop(
+            facelet_string, settings.CFOP_MAX_NODES, settings.CFOP_TIME_LIMIT
+        )
+        return " ".join(move for stage in stages for move in stage["moves"]), stages
+    return solution_cache.solve(facelet_string), None
+
+
+def solve(
+    facelet_string: str,
+    mode: str,
+    max_nodes: Optional[int] = None,
+    time_limit: Optional[float] = None,
+) -> Solution:
+    """
+    Solve a 54-character (3x3) or 24-character (2x2) facelet string.
+
+    2x2 cubes are always solved optimally. ``max_nodes`` and ``time_limit``
+    can only lower the configured caps of mode="optimal".
+    """
+    pocket_cube = len(facelet_string) == len(SOLVED_FACELETS_2X2)
+    if pocket_cube:
+        mode = CubeState.OPTIMAL
+    if facelet_string in (SOLVED_FACELETS, SOLVED_FACELETS_2X2):
+        return Solution(mode, [], 0.0, False, [] if mode == CubeState.CFOP else None)
+
+    solver_name = SOLVER_NAMES[mode]
+    solve_start = time.time()
+    stages: Optional[List[Dict[str, object]]] = None
+    try:
+        solution_string = known_solution(facelet_string, mode)
+        cached = solution_string is not None
+        if solution_string is None:
+            solution_string, stages = _work_out(
+                facelet_string, mode, max_nodes, time_limit
+            )
+    except SearchLimitExceeded as e:
+        raise SolveFailed(f"{solver_name} search did not finish: {e}", 422)
+    except PatternDatabaseMissing as e:
+        print(f"{solver_name} solver unavailable: {e}")
+        raise SolveFailed(f"{solver_name} solver is not available", 503)
+    except ValueError as e:
+        # Likely kociemba or the cubie model saying the state is impossible
+        raise SolveFailed(
+            "Invalid cube configuration - this cube state is not physically solvable",
+            400,
+            details=str(e),
+        )
+    solve_time_ms = (time.time() - solve_start) * 1000
+
+    if solution_string == "Error":
+        raise SolveFailed("Cube state is unsolvable", 400)
+    return Solution(mode, solution_string.split(), solve_time_ms, cached, stages)
+
+
+def record_solve(
+    facelet_string: str, solution: Solution, ip_address: Optional[str] = None
+) -> CubeSolve:
+    """Store a solve in the history."""
+    solve = prepare_solve(facelet_string, solution, ip_address)
+    solve.save(force_insert=True)
+    return solve
+
+
+def prepare_solve(
+    facelet_string: str, solution: Solution, ip_address: Optional[str] = None
+) -> CubeSolve:
+    """A history entry for a solve, not saved yet."""
+    return CubeSolve.objects.prepare(
+        facelet_string=facelet_string,
+        solution=" ".join(solution.moves),
+        move_count=len(solution.moves),
+        solve_time_ms=solution.solve_time_ms,
+        ip_address=ip_address,
+        mode=solution.mode,
+        cached=solution.cached,
+    )
@@ -1,6 +1,92 @@
-from django.test import TestCase, Client  # type: ignore
-from .views import validate_cube_state, cube_array_to_facelet_string
 import json
+import os
+import queue
+import re
+import tempfile
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import kociemba
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.db.models import Max, Min
+from django.test import Client, override_settings  # type: ignore
+from django.test import TestCase as DjangoTestCase  # type: ignore
+from django.test.utils import CaptureQueriesContext
+
+from . import cube as cubies
+from . import pattern, pocket, pool, solution_cache, solving
+from .admin import EstimatedCountPaginator, TimestampSeekQuerySet
+from .cfop import (
+    OLL_ALGORITHMS,
+    PLL_ALGORITHMS,
+    get_case_tables,
+    orientation_key,
+    permutation_key,
+    solve_cfop,
+    to_face_turns,
+)
+from .codecs import msgpack
+from .events import SolveBroadcaster, SolveFeed
+from .jobs import claim_job, run_job, solve_facelet_string
+from .models import CubeSolve, CubeState, SolveJob
+from .optimal import SearchLimitExceeded, solve_optimal
+from .pattern import (
+    PatternDatabase,
+    RankedPatternDatabase,
+    get_pattern_database,
+    state_to_codes,
+)
+from .pocket import SOLVED_FACELETS_2X2, apply_moves_2x2, is_solved_2x2
+from .profiling import profiler
+from .scramble import generate_scrambles
+from .solution_cache import PROBE_LIMIT, SolutionCache
+from .verify import check_solution
+from .views import (
+    cube_array_to_facelet_string,
+    facelet_string_to_cube_array,
+    parse_history_filters,
+    validate_2x2_cube_state,
+    validate_cube_state,
+)
+
+
+@override_settings(SOLUTION_CACHE_PATH=None)
+class TestCase(DjangoTestCase):
+    """
+    Base for every test here: the shared solution cache is off, so tests
+    neither read nor write the developer's real solution_cache.bin (tests of
+    the cache point it at a temporary file).
+    """
+
+    @staticmethod
+    def isolate(add_cleanup, *patchers, **overrides) -> Path:
+        """
+        Override settings and start mock patchers until ``add_cleanup``'s
+        cleanups run (``self.addCleanup`` in setUp, ``cls.addClassCleanup``
+        in setUpClass). Settings given as relative Paths are placed in a new
+        temporary directory, which is returned.
+        """
+        tmp = tempfile.TemporaryDirectory()
+        add_cleanup(tmp.cleanup)
+        directory = Path(tmp.name)
+        settings_override = override_settings(
+            **{
+                name: directory / value if isinstance(value, Path) else value
+                for name, value in overrides.items()
+            }
+        )
+        settings_override.enable()
+        add_cleanup(settings_override.disable)
+        for patcher in patchers:
+            patcher.start()
+            add_cleanup(patcher.stop)
+        return directory
 
 
 class CubeValidationTests(TestCase):
@@ -61,6 +147,759 @@ class CubeFaceletStringTests(TestCase):
         )
 
 
+class ScrambleTests(TestCase):
+    def test_random_states_are_solvable(self):
+        for state in cubies.random_states(5, seed=1):
+            facelet = cubies.state_to_facelets(state)
+            solution = kociemba.solve(facelet).split()
+            self.assertEqual(
+                cubies.apply_moves_to_state(state, solution), cubies.SOLVED_STATE
+            )
+
+    def test_scramble_sequence_reaches_state(self):
+        (item,) = generate_scrambles(1, with_sequences=True, seed=7)
+        state = cubies.apply_moves_to_state(cubies.SOLVED_STATE, item["scramble"])
+        self.assertEqual(cubies.state_to_facelets(state), item["facelet_string"])
+
+    def test_facelet_round_trip(self):
+        facelet = cubies.state_to_facelets(cubies.random_state())
+        cube = facelet_string_to_cube_array(facelet)
+        self.assertEqual(cube_array_to_facelet_string(cube), facelet)
+
+
+class VerifySolvesTests(TestCase):
+    def test_reports_mismatches(self):
+        good = CubeState.objects.create(
+            facelet_string=cubies.apply_moves(cubies.SOLVED_FACELETS, ["R", "U"]),
+            solution="U' R'",
+            move_count=2,
+        )
+        bad = CubeState.objects.create(
+            facelet_string=cubies.apply_moves(cubies.SOLVED_FACELETS, ["R"]),
+            solution="R",
+            move_count=1,
+        )
+
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("verify_solves", "--workers=1", stdout=out)
+        self.assertIn(f"CubeState {bad.pk}:", out.getvalue())
+        self.assertNotIn(f"CubeState {good.pk}:", out.getvalue())
+
+
+class HistoryStreamTests(TestCase):
+    def test_one_read_fans_out_to_every_stream(self):
+        hub = SolveBroadcaster(reader=False)
+        streams = [hub.subscribe() for _ in range(5)]
+        hub.step()
+        solve = CubeSolve.objects.record(cubies.SOLVED_FACELETS, "", 0, 0)
+        with CaptureQueriesContext(connection) as queries:
+            hub.step()
+        self.assertEqual(len(queries), 1)
+        for stream in streams:
+            self.assertEqual(stream.get(timeout=0)[0], solve.pk)
+
+        hub.unsubscribe(streams[0])
+        hub.close()
+        self.assertTrue(hub.closed)
+        for stream in streams[1:]:
+            self.assertIsNone(stream.get(timeout=0))
+
+    def test_failed_read_ends_joining_streams(self):
+        hub = SolveBroadcaster(reader=False)
+        stream = hub.subscribe(after_id=0)
+        hub.step()
+        joining = hub.subscribe(after_id=0)
+        with mock.patch.object(SolveFeed, "fetch", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                hub.step()
+        # The joining stream resumes from scratch; the live one is untouched
+        self.assertIsNone(joining.get(timeout=0))
+        with self.assertRaises(queue.Empty):
+            stream.get(timeout=0)
+
+    def test_feed_delivers_solves_committed_out_of_order(self):
+        state = CubeState.objects.create(
+            facelet_string=cubies.SOLVED_FACELETS, solution="", move_count=0
+        )
+        feed = SolveFeed(0, gap_timeout=60)
+        CubeSolve.objects.create(pk=1, state=state, solve_time_ms=0)
+        CubeSolve.objects.create(pk=3, state=state, solve_time_ms=0)
+        self.assertEqual([s.pk for s in feed.fetch(10)], [1, 3])
+        # Row 2 commits after row 3 was sent
+        CubeSolve.objects.create(pk=2, state=state, solve_time_ms=0)
+        CubeSolve.objects.create(pk=4, state=state, solve_time_ms=0)
+        self.assertEqual([s.pk for s in feed.fetch(10)], [2, 4])
+        self.assertEqual(feed.fetch(10), [])
+
+    def test_resume_replays_missed_solves(self):
+        hub = SolveBroadcaster(reader=False)
+        first = CubeSolve.objects.record(cubies.SOLVED_FACELETS, "", 0, 0)
+        second = CubeSolve.objects.record(cubies.SOLVED_FACELETS, "", 0, 0)
+        with mock.patch("solver.views.broadcaster", hub):
+            response = self.client.get(
+                "/history/stream/", HTTP_LAST_EVENT_ID=str(first.pk)
+            )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        hub.step()
+        chunks = iter(response.streaming_content)
+        next(chunks)  # retry interval
+        message = next(chunks).decode()
+        self.assertTrue(message.startswith(f"id: {second.pk}\n"))
+        self.assertIn('"move_count": 0', message)
+
+
+class HistoryFilterTests(TestCase):
+    def setUp(self):
+        short = cubies.apply_moves(cubies.SOLVED_FACELETS, ["R"])
+        long = cubies.apply_moves(cubies.SOLVED_FACELETS, ["R", "U", "F"])
+        CubeSolve.objects.record(short, "R'", 1, 1, "10.0.0.1")
+        CubeSolve.objects.record(long, "F' U' R'", 3, 1, "10.0.0.2")
+        old = CubeSolve.objects.record(long, "F' U' R'", 3, 1, "10.0.0.1")
+        old.timestamp = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        old.save()
+
+    def history(self, **params):
+        response = self.client.get("/history/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_filters(self):
+        self.assertEqual(self.history(ip="10.0.0.1")["total_count"], 2)
+        self.assertEqual(self.history(since="2021-01-01")["total_count"], 2)
+        self.assertEqual(self.history(until="2021-01-01")["total_count"], 1)
+        self.assertEqual(self.history(min_moves=2)["total_count"], 2)
+        self.assertEqual(self.history(max_moves=2, ip="10.0.0.1")["total_count"], 1)
+
+    def test_invalid_filter(self):
+        response = self.client.get("/history/", {"since": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_filtered_queries_use_indexes(self):
+        for params in (
+            {},
+            {"ip": "10.0.0.1"},
+            {"ip": "10.0.0.1", "since": "2021-01-01"},
+            {"since": "2021-01-01", "until": "2022-01-01"},
+            {"min_moves": "2", "max_moves": "5"},
+        ):
+            filters, _ = parse_history_filters(params)
+            queryset = CubeSolve.objects.filter(**filters).select_related("state")
+            plan = queryset[:50].explain()
+            # "SCAN table" without "USING ... INDEX" is a full table scan
+            self.assertIsNone(
+                re.search(r"SCAN solver_\w+\s*$", plan, re.MULTILINE),
+                f"{params} falls back to a table scan:\n{plan}",
+            )
+
+
+class OptimalSolverTests(TestCase):
+    def setUp(self):
+        # One tiny database per cubie keeps the build instant while still
+        # covering the whole cube, as the real databases do.
+        databases = {f"corner{c}": ((c,), ()) for c in range(8)}
+        databases.update({f"edge{e}": ((), (e,)) for e in range(12)})
+        self.isolate(
+            self.addCleanup,
+            mock.patch.dict(pattern.PATTERN_DATABASES, databases, clear=True),
+            mock.patch.dict(pattern.CFOP_PATTERN_DATABASES, clear=True),
+            mock.patch.dict(pattern._loaded, clear=True),
+            PATTERN_DB_DIR=Path(),
+        )
+        call_command("build_pattern_dbs", stdout=StringIO())
+
+    def test_pattern_database_round_trip(self):
+        state = cubies.apply_moves_to_state(cubies.SOLVED_STATE, ["R", "U"])
+        corners, edges = state_to_codes(state)
+        # R sends the UR edge to BR, U leaves it there, and R' brings it home
+        self.assertEqual(get_pattern_database("edge0").lookup(corners, edges), 1)
+        # The UFL corner is moved by U alone and returns with U'
+        self.assertEqual(get_pattern_database("corner1").lookup(corners, edges), 1)
+
+    def test_ranked_database_matches_code_indexed_one(self):
+        ranked = RankedPatternDatabase("ranked", (4,), (8, 4))
+        ranked.build()
+        by_codes = PatternDatabase("by_codes", (4,), (8, 4))
+        by_codes.build()
+        # Every entry is used, where 24**3 codes would leave 1152 unused
+        self.assertEqual(ranked.size, 8 * 3 * 12 * 11 * 4)
+        for state in cubies.random_states(200, seed=7):
+            corners, edges = state_to_codes(state)
+            self.assertEqual(
+                ranked.lookup(corners, edges), by_codes.lookup(corners, edges)
+            )
+
+    def test_solution_is_optimal(self):
+        facelet = cubies.apply_moves(cubies.SOLVED_FACELETS, ["R", "U2", "F'"])
+        solution = solve_optimal(facelet, max_nodes=1_000_000)
+        self.assertEqual(len(solution), 3)
+        self.assertEqual(cubies.apply_moves(facelet, solution), cubies.SOLVED_FACELETS)
+
+    def test_node_limit(self):
+        facelet = cubies.apply_moves(cubies.SOLVED_FACELETS, ["R", "U2", "F'", "L"])
+        with self.assertRaises(SearchLimitExceeded):
+            solve_optimal(facelet, max_nodes=10)
+
+    def test_solve_endpoint_records_mode(self):
+        facelet = cubies.apply_moves(cubies.SOLVED_FACELETS, ["R", "U"])
+        response = self.client.post(
+            "/solve/",
+            data=json.dumps(
+                {"cube": facelet_string_to_cube_array(facelet), "mode": "optimal"}
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["solution"], ["U'", "R'"])
+        self.assertEqual(CubeSolve.objects.get().mode, "optimal")
+
+    def test_caps_cannot_lift_server_limits(self):
+        facelet = cubies.apply_moves(cubies.SOLVED_FACELETS, ["R", "U"])
+        for caps in ({"time_limit": 0}, {"time_limit": -1}, {"max_nodes": 0}):
+            response = self.client.post(
+                "/solve/",
+                data=json.dumps(
+                    {
+                        "cube": facelet_string_to_cube_array(facelet),
+                        "mode": "optimal",
+                        **caps,
+                    }
+                ),
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 400, caps)
+
+
+class PocketCubeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.isolate(
+            cls.addClassCleanup,
+            mock.patch.object(pocket, "_table", None),
+            PATTERN_DB_DIR=Path(),
+        )
+        # The complete table takes a while in pure Python (build_2x2_table);
+        # the scrambles below are all within a few moves of solved.
+        pocket.save_distance_table(
+            pocket.build_distance_table(max_depth=5), pocket.distance_table_path()
+        )
+
+    def scrambled(self, moves):
+        facelet = apply_moves_2x2(SOLVED_FACELETS_2X2, moves)
+        colors = {face: i for i, face in enumerate("URFDLB")}
+        return [
+            [[colors[facelet[f * 4 + r * 2 + c]] for c in range(2)] for r in range(2)]
+            for f in range(6)
+        ]
+
+    def test_validation(self):
+        cube = self.scrambled(["R", "U", "L'", "B2", "D"])
+        self.assertEqual(validate_2x2_cube_state(cube), (True, "Valid"))
+
+        # Swap two stickers of one corner: a twisted, unsolvable cube
+        cube[0][1][1], cube[1][0][0] = cube[1][0][0], cube[0][1][1]
+        valid, msg = validate_2x2_cube_state(cube)
+        self.assertFalse(valid)
+
+    def test_solve_2x2(self):
+        # Turns of D, L and B also move the DBL corner the solver holds fixed
+        response = self.client.post(
+            "/solve/",
+            data=json.dumps({"cube": self.scrambled(["R", "U'", "F2", "L", "D"])}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result["move_count"], 5)
+        self.assertTrue(
+            is_solved_2x2(apply_moves_2x2(result["facelet_string"], result["solution"]))
+        )
+        self.assertEqual(CubeState.objects.get().mode, CubeState.OPTIMAL)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.isolate(self.addCleanup, PROFILING_DIR=Path())
+        self.addCleanup(profiler.disable)
+
+        self.staff = User.objects.create_user("staff", password="pw", is_staff=True)
+
+    def test_requires_staff(self):
+        response = self.client.get("/profiling/")
+        self.assertEqual(response.status_code, 302)
+
+    def test_profiles_next_requests(self):
+        self.client.force_login(self.staff)
+        response = self.client.post(
+            "/profiling/",
+            data=json.dumps({"paths": ["/health/"], "requests": 1, "memory": True}),
+            content_type="application/json",
+        )
+        self.assertTrue(response.json()["profiling"]["active"])
+
+        self.client.get("/history/")  # not a profiled path
+        self.client.get("/health/")
+        self.client.get("/health/")  # over the request budget
+
+        result = self.client.get("/profiling/").json()
+        self.assertFalse(result["profiling"]["active"])
+        self.assertEqual(result["summary"]["profiles"], 1)
+        self.assertEqual(result["summary"]["snapshots"], 1)
+        self.assertTrue(
+            any("health_check" in f["function"] for f in result["summary"]["functions"])
+        )
+
+    def test_switch_is_shared_by_worker_processes(self):
+        profiler.enable(["/solve/"], requests=3)
+        pid = os.fork()
+        if not pid:
+            # Another worker process sees the switch and spends the budget
+            claimed = [profiler.claim("/solve/") for _ in range(2)]
+            os._exit(0 if None not in claimed else 1)
+        self.assertEqual(os.waitpid(pid, 0)[1], 0)
+        self.assertEqual(profiler.status()["remaining"], 1)
+        self.assertIsNotNone(profiler.claim("/solve/"))
+        self.assertIsNone(profiler.claim("/solve/"))
+        self.assertFalse(profiler.active)
+
+
+class CodecTests(TestCase):
+    def setUp(self):
+        self.cube = facelet_string_to_cube_array(
+            cubies.apply_moves(cubies.SOLVED_FACELETS, ["R", "U"])
+        )
+
+    def test_json_is_default(self):
+        # With orjson if installed, and with the standard library fallback
+        for codec in (nullcontext(), mock.patch("solver.codecs.orjson", None)):
+            with codec:
+                response = self.client.post(
+                    "/solve/",
+                    data=json.dumps({"cube": self.cube}),
+                    content_type="application/json",
+                )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "application/json")
+            self.assertIn("Accept", response["Vary"])
+            self.assertEqual(response.json()["move_count"], 2)
+
+        response = self.client.post(
+            "/solve/", data=b"{not json", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Invalid JSON in request body")
+
+    def test_msgpack(self):
+        if msgpack is None:
+            self.skipTest("msgpack is not installed")
+
+        response = self.client.post(
+            "/validate/",
+            data=msgpack.packb({"cube": self.cube}),
+            content_type="application/msgpack",
+            headers={"Accept": "application/msgpack"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertTrue(msgpack.unpackb(response.content)["valid"])
+
+        self.client.post(
+            "/solve/",
+            data=msgpack.packb({"cube": self.cube}),
+            content_type="application/msgpack",
+        )
+        response = self.client.get(
+            "/history/", headers={"Accept": "application/msgpack"}
+        )
+        solves = msgpack.unpackb(response.content)["solves"]
+        self.assertEqual(solves[0]["solution"], ["U'", "R'"])
+
+        response = self.client.post(
+            "/solve/", data=b"\xc1", content_type="application/msgpack"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["error"], "Invalid MessagePack in request body"
+        )
+
+    @mock.patch("solver.codecs.msgpack", None)
+    def test_msgpack_not_installed(self):
+        response = self.client.post(
+            "/solve/", data=b"\x81", content_type="application/msgpack"
+        )
+        self.assertEqual(response.status_code, 415)
+        self.assertEqual(
+            response.json()["error"], "MessagePack request bodies are not supported"
+        )
+
+        # Nothing else would do: 406 before the view runs
+        for path in ("/history/", "/jobs/1/"):
+            response = self.client.get(path, headers={"Accept": "application/msgpack"})
+            self.assertEqual(response.status_code, 406)
+            self.assertEqual(response["Content-Type"], "application/json")
+        response = self.client.post(
+            "/solve/",
+            data=json.dumps({"cube": self.cube}),
+            content_type="application/json",
+            headers={"Accept": "application/msgpack"},
+        )
+        self.assertEqual(response.status_code, 406)
+        self.assertFalse(CubeSolve.objects.exists())
+
+        # JSON is still acceptable here
+        response = self.client.get(
+            "/history/", headers={"Accept": "application/msgpack, */*;q=0.1"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+
+
+class SolveJobTests(TestCase):
+    def submit(self, *facelets):
+        response = self.client.post(
+            "/jobs/",
+            data=json.dumps(
+                {"cubes": [facelet_string_to_cube_array(f) for f in facelets]}
+            ),
+            content_type="application/json",
+        )
+        return response
+
+    def test_worker_solves_queued_job(self):
+        facelets = [
+            cubies.state_to_facelets(state) for state in cubies.random_states(2, 3)
+        ]
+        response = self.submit(*facelets)
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["job"]["job_id"]
+        self.assertEqual(
+            self.client.get(f"/jobs/{job_id}/").json()["job"]["status"], "queued"
+        )
+
+        call_command("solve_worker", "--once", stdout=StringIO())
+
+        job = self.client.get(f"/jobs/{job_id}/").json()["job"]
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["completed"], 2)
+        for facelet, result in zip(facelets, job["results"]):
+            self.assertEqual(check_solution(facelet, " ".join(result["solution"])), "")
+        self.assertEqual(self.client.get("/history/").json()["total_count"], 2)
+
+    def test_invalid_cube_is_rejected(self):
+        bad = cubies.SOLVED_FACELETS[:-1] + "U"
+        response = self.submit(cubies.SOLVED_FACELETS, bad)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Invalid cube 1", response.json()["error"])
+        self.assertEqual(SolveJob.objects.count(), 0)
+
+    def test_claims_are_exclusive_and_lapsed_jobs_retried(self):
+        job = SolveJob.objects.create(
+            facelet_strings=[cubies.SOLVED_FACELETS], max_attempts=2
+        )
+        self.assertEqual(claim_job("a").pk, job.pk)
+        self.assertIsNone(claim_job("b"))
+
+        # Worker "a" dies: once its lease lapses, "b" takes over
+        lapsed = datetime.now(timezone.utc) - timedelta(seconds=1)
+        SolveJob.objects.filter(pk=job.pk).update(lease_expires_at=lapsed)
+        taken = claim_job("b")
+        self.assertEqual((taken.worker, taken.attempts), ("b", 2))
+        self.assertFalse(run_job(job, "a"))
+
+        # After max_attempts claims the job is failed instead of retried
+        SolveJob.objects.filter(pk=job.pk).update(lease_expires_at=lapsed)
+        self.assertIsNone(claim_job("c"))
+        self.assertEqual(SolveJob.objects.get(pk=job.pk).status, SolveJob.FAILED)
+
+    @override_settings(SOLVE_JOB_SAVE_INTERVAL=3600)
+    def test_retried_job_records_each_solve_once(self):
+        facelets = [
+            cubies.state_to_facelets(state) for state in cubies.random_states(2, 4)
+        ]
+        job = SolveJob.objects.create(facelet_strings=facelets)
+        solve = solving.solve
+        calls = []
+
+        def crash_on_second(facelet_string, mode):
+            calls.append(facelet_string)
+            if len(calls) == 2:
+                raise RuntimeError("worker crashed")
+            return solve(facelet_string, mode)
+
+        # The first cube is solved but never saved, so neither is its solve
+        with mock.patch("solver.solving.solve", crash_on_second):
+            with self.assertRaises(RuntimeError):
+                run_job(claim_job("a"), "a")
+        self.assertEqual(SolveJob.objects.get(pk=job.pk).results, [])
+        self.assertFalse(CubeSolve.objects.exists())
+
+        self.assertTrue(run_job(claim_job("b"), "b"))
+        self.assertEqual(len(SolveJob.objects.get(pk=job.pk).results), 2)
+        self.assertEqual(CubeSolve.objects.count(), 2)
+
+
+class CubeSolveAdminTests(TestCase):
+    def setUp(self):
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        facelet = cubies.apply_moves(cubies.SOLVED_FACELETS, ["R", "U"])
+        for i in range(5):
+            solve = CubeSolve.objects.record(facelet, "U' R'", 2, 1)
+            # Two solves share a timestamp to exercise the pk tie-break
+            solve.timestamp = start + timedelta(minutes=min(i, 3))
+            solve.save()
+        self.wrong = CubeSolve.objects.record(cubies.SOLVED_FACELETS, "R", 1, 1)
+        self.client.force_login(User.objects.create_superuser("admin"))
+
+    def test_changelist(self):
+        response = self.client.get("/admin/solver/cubesolve/", {"moves": "0-10"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<td class="field-move_count">2</td>', count=5)
+
+    def test_pages_match_offset_pagination(self):
+        queryset = CubeSolve.objects.select_related("state").order_by(
+            *EstimatedCountPaginator.SEEK_ORDERING
+        )
+        paginator = EstimatedCountPaginator(queryset, 2)
+        self.assertEqual(paginator.count, 6)
+        for number in (1, 2, 3):
+            self.assertEqual(
+                list(paginator.page(number).object_list),
+                list(queryset[(number - 1) * 2 : number * 2]),
+            )
+
+    def test_date_hierarchy_seeks_match_distinct_dates(self):
+        seeking = TimestampSeekQuerySet(CubeSolve)
+        date_range = {"first": Min("timestamp"), "last": Max("timestamp")}
+        self.assertEqual(
+            seeking.aggregate(**date_range), CubeSolve.objects.aggregate(**date_range)
+        )
+        for kind in ("year", "month", "day"):
+            self.assertEqual(
+                seeking.datetimes("timestamp", kind),
+                list(CubeSolve.objects.datetimes("timestamp", kind)),
+            )
+
+    def test_chunked_actions(self):
+        def run(action):
+            return self.client.post(
+                "/admin/solver/cubesolve/",
+                {
+                    "action": action,
+                    "select_across": "1",
+                    "index": "0",
+                    "_selected_action": [self.wrong.pk],
+                },
+                follow=True,
+            )
+
+        with override_settings(ADMIN_ACTION_CHUNK_SIZE=2):
+            response = run("verify_solutions")
+            self.assertContains(response, "1 of 6 solution(s) are wrong")
+            self.assertContains(response, f"#{self.wrong.pk}")
+            run("delete_in_chunks")
+        self.assertFalse(CubeSolve.objects.exists())
+
+
+class SolutionCacheTests(TestCase):
+    def setUp(self):
+        if solution_cache.fcntl is None:
+            self.skipTest("fcntl is not available")
+        directory = self.isolate(
+            self.addCleanup,
+            SOLUTION_CACHE_PATH=Path("solutions.bin"),
+            SOLUTION_CACHE_SLOTS=64,
+        )
+        self.path = directory / "solutions.bin"
+        self.addCleanup(solution_cache._opened.clear)
+
+    def test_shared_between_processes(self):
+        facelet = cubies.apply_moves(cubies.SOLVED_FACELETS, ["R", "U2", "F'"])
+        self.assertIsNone(solution_cache.lookup(facelet))
+        pid = os.fork()
+        if not pid:
+            # A separate process with its own mapping of the same file
+            solution_cache._opened.clear()
+            os._exit(0 if solution_cache.solve(facelet) else 1)
+        self.assertEqual(os.waitpid(pid, 0)[1], 0)
+        self.assertEqual(solution_cache.lookup(facelet), "F U2 R'")
+
+    def test_eviction_is_bounded(self):
+        cache = SolutionCache.open(self.path, PROBE_LIMIT)
+        self.addCleanup(cache.close)
+        facelets = [
+            cubies.state_to_facelets(state)
+            for state in cubies.random_states(PROBE_LIMIT + 4, 7)
+        ]
+        for facelet in facelets:
+            self.assertTrue(cache.put(facelet, "R U R'"))
+        cached = [f for f in facelets if cache.get(f) is not None]
+        self.assertEqual(len(cached), PROBE_LIMIT)
+        self.assertEqual(cache.get(facelets[-1]), "R U R'")
+        self.assertFalse(cache.put(facelets[0], " ".join(["R"] * 40)))
+
+    def test_slot_left_mid_write_recovers(self):
+        cache = SolutionCache.open(self.path, 64)
+        self.addCleanup(cache.close)
+        facelet = cubies.apply_moves(cubies.SOLVED_FACELETS, ["R"])
+        self.assertTrue(cache.put(facelet, "R'"))
+        offset = next(cache._offsets(solution_cache.pack_facelets(facelet)))
+        for sequence in (7, 0xFFFFFFFF):
+            # A writer died between marking the slot and publishing it
+            solution_cache._SEQUENCE.pack_into(cache._data, offset, sequence)
+            self.assertIsNone(cache.get(facelet))
+            self.assertTrue(cache.put(facelet, "R'"))
+            (published,) = solution_cache._SEQUENCE.unpack_from(cache._data, offset)
+            self.assertEqual(published, (sequence + 1) & 0xFFFFFFFF or 2)
+            self.assertEqual(cache.get(facelet), "R'")
+
+    def test_solve_view_fills_cache(self):
+        facelet = cubies.apply_moves(cubies.SOLVED_FACELETS, ["D", "L"])
+        response = self.client.post(
+            "/solve/",
+            data=json.dumps({"cube": facelet_string_to_cube_array(facelet)}),
+            content_type="application/json",
+        )
+        self.assertEqual(
+            solution_cache.lookup(facelet), " ".join(response.json()["solution"])
+        )
+
+
+class CfopTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.isolate(
+            cls.addClassCleanup,
+            mock.patch.dict(pattern._loaded, clear=True),
+            PATTERN_DB_DIR=Path(),
+        )
+        call_command(
+            "build_pattern_dbs",
+            *pattern.CFOP_PATTERN_DATABASES,
+            stdout=StringIO(),
+        )
+
+    def test_face_turns(self):
+        self.assertEqual(
+            to_face_turns("r U R' U' r' F R F'"),
+            ["L", "F", "R'", "F'", "L'", "F", "R", "F'"],
+        )
+        self.assertEqual(to_face_turns("y R y' R2 R"), ["B", "R'"])
+        with self.assertRaises(ValueError):
+            to_face_turns("R3")
+
+    def test_case_tables_cover_every_last_layer(self):
+        oll_table, pll_table = get_case_tables()
+        self.assertEqual(len(oll_table), 216)
+        self.assertEqual(len(pll_table), 288)
+        self.assertEqual(
+            {case.name for case in oll_table.values()}, {"skip", *OLL_ALGORITHMS}
+        )
+        self.assertEqual(
+            {case.name for case in pll_table.values()}, {"skip", *PLL_ALGORITHMS}
+        )
+
+        solved = cubies.SOLVED_STATE
+        for key, case in oll_table.items():
+            state = (solved[0], key[:4] + (0,) * 4, solved[2], key[4:] + (0,) * 8)
+            after = cubies.apply_moves_to_state(state, case.moves)
+            self.assertEqual(orientation_key(after), (0,) * 8, case)
+            self.assertEqual(after[0][4:] + after[2][4:], solved[0][4:] + solved[2][4:])
+        for key, case in pll_table.items():
+            state = (
+                key[:4] + (4, 5, 6, 7),
+                solved[1],
+                key[4:] + solved[2][4:],
+                solved[3],
+            )
+            after = cubies.apply_moves_to_state(state, case.moves)
+            self.assertEqual(after, solved, case)
+            self.assertEqual(permutation_key(after), (0, 1, 2, 3) * 2)
+
+    def test_solve_endpoint_returns_stages(self):
+        facelet = cubies.state_to_facelets(next(iter(cubies.random_states(1, 5))))
+        response = self.client.post(
+            "/solve/",
+            data=json.dumps(
+                {"cube": facelet_string_to_cube_array(facelet), "mode": "cfop"}
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        stages = result["stages"]
+        # One F2L stage per search, which may fill more than one slot
+        self.assertEqual(
+            [stage["stage"] for stage in stages],
+            ["cross"] + ["f2l"] * (len(stages) - 3) + ["oll", "pll"],
+        )
+        state = facelet
+        for stage in stages:
+            state = cubies.apply_moves(state, stage["moves"])
+            self.assertEqual(stage["facelet_string"], state)
+        self.assertEqual(state, cubies.SOLVED_FACELETS)
+        self.assertEqual(
+            result["solution"], [m for stage in stages for m in stage["moves"]]
+        )
+        cross = cubies.facelets_to_state(stages[0]["facelet_string"])
+        self.assertEqual(cross[2][4:8] + cross[3][4:8], (4, 5, 6, 7, 0, 0, 0, 0))
+        self.assertEqual(
+            sorted(slot for stage in stages[1:-2] for slot in stage["slots"]),
+            ["BL", "BR", "FL", "FR"],
+        )
+        self.assertEqual(CubeSolve.objects.get().mode, "cfop")
+
+    def test_f2l_search_limits(self):
+        facelet = cubies.state_to_facelets(next(iter(cubies.random_states(1, 7))))
+        with self.assertRaises(SearchLimitExceeded):
+            solve_cfop(facelet, max_nodes=1)
+        with self.assertRaises(SearchLimitExceeded):
+            solve_cfop(facelet, max_nodes=10**9, time_limit=1e-9)
+
+        with override_settings(CFOP_MAX_NODES=1):
+            response = self.client.post(
+                "/solve/",
+                data=json.dumps(
+                    {"cube": facelet_string_to_cube_array(facelet), "mode": "cfop"}
+                ),
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("CFOP search did not finish", response.json()["error"])
+
+    def test_corrupt_cross_database(self):
+        facelet = cubies.apply_moves(cubies.SOLVED_FACELETS, ["R", "U"])
+        # No move ever gets closer to the cross
+        with mock.patch.object(pattern.PatternDatabase, "lookup", return_value=3):
+            with self.assertRaisesRegex(ValueError, "Corrupt"):
+                solve_cfop(facelet, max_nodes=10**6)
+
+    def test_random_states(self):
+        for state in cubies.random_states(5, 11):
+            facelet = cubies.state_to_facelets(state)
+            stages = solve_cfop(
+                facelet, settings.CFOP_MAX_NODES, settings.CFOP_TIME_LIMIT
+            )
+            moves = [m for stage in stages for m in stage["moves"]]
+            self.assertEqual(cubies.apply_moves(facelet, moves), cubies.SOLVED_FACELETS)
+
+    def test_solved_cube_has_empty_stages(self):
+        response = self.client.post(
+            "/solve/",
+            data=json.dumps(
+                {
+                    "cube": facelet_string_to_cube_array(cubies.SOLVED_FACELETS),
+                    "mode": "cfop",
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(response.json()["stages"], [])
+        result, _ = solve_facelet_string(cubies.SOLVED_FACELETS, "cfop")
+        self.assertEqual(result["stages"], [])
+
+
 class CubeApiTests(TestCase):
     def setUp(self):
         self.client = Client()
@@ -101,3 +940,44 @@ class CubeApiTests(TestCase):
         )
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response.json()["valid"])
+
+    def test_scramble(self):
+        response = self.client.get("/scramble/", {"count": 3, "seed": 1})
+        self.assertEqual(response.status_code, 200)
+        scrambles = response.json()["scrambles"]
+        self.assertEqual(len(scrambles), 3)
+        for item in scrambles:
+            valid, _ = validate_cube_state(item["cube"])
+            self.assertTrue(valid)
+
+    def test_scramble_sequences_are_solved_inline(self):
+        response = self.client.get("/scramble/", {"count": 3, "sequence": 1})
+        self.assertEqual(response.status_code, 200)
+        for item in response.json()["scrambles"]:
+            self.assertEqual(
+                cubies.apply_moves(cubies.SOLVED_FACELETS, item["scramble"]),
+                item["facelet_string"],
+            )
+        # Web workers are threaded; they must never fork a solver pool
+        self.assertIsNone(pool._pool)
+
+    def test_repeated_state_is_stored_once(self):
+        facelet = cubies.apply_moves(cubies.SOLVED_FACELETS, ["R", "U", "F"])
+        for _ in range(2):
+            response = self.client.post(
+                "/solve/",
+                data=json.dumps({"cube": facelet_string_to_cube_array(facelet)}),
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(CubeState.objects.filter(facelet_string=facelet).count(), 1)
+        self.assertEqual(
+            CubeSolve.objects.filter(state__facelet_string=facelet).count(), 2
+        )
+
+        history = self.client.get("/history/").json()["solves"]
+        self.assertEqual(history[0]["facelet_string"], facelet)
+        self.assertEqual(history[0]["move_count"], 3)
+        # The repeat is a lookup, flagged so it does not skew solve timings
+        self.assertTrue(history[0]["cached"])
+        self.assertFalse(history[1]["cached"])
@@ -0,0 +1,40 @@
+"""
+Checks that stored solutions actually solve their stored cube states.
+"""
+
+from typing import Iterable, List, Tuple
+
+from .cube import SOLVED_FACELETS, apply_moves
+from .pocket import SOLVED_FACELETS_2X2, apply_moves_2x2, is_solved_2x2
+
+# (id, facelet_string, solution)
+SolveRow = Tuple[int, str, str]
+
+
+def check_solution(facelet_string: str, solution: str) -> str:
+    """
+    Return an empty string if ``solution`` solves ``facelet_string``,
+    otherwise a short description of the problem.
+    """
+    try:
+        if len(facelet_string) == len(SOLVED_FACELETS):
+            solved = apply_moves(facelet_string, solution.split()) == SOLVED_FACELETS
+        elif len(facelet_string) == len(SOLVED_FACELETS_2X2):
+            solved = is_solved_2x2(apply_moves_2x2(facelet_string, solution.split()))
+        else:
+            return f"facelet string has length {len(facelet_string)}"
+    except KeyError as e:
+        return f"unknown move {e.args[0]!r}"
+    if not solved:
+        return "solution does not solve the cube"
+    return ""
+
+
+def find_mismatches(rows: Iterable[SolveRow]) -> List[Tuple[int, str]]:
+    """Return ``(id, reason)`` for every row whose solution is wrong."""
+    mismatches: List[Tuple[int, str]] = []
+    for row_id, facelet_string, solution in rows:
+        reason = check_solution(facelet_string, solution)
+        if reason:
+            mismatches.append((row_id, reason))
+    return mismatches
@@ -1,14 +1,28 @@
-from django.http import JsonResponse, HttpRequest
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_ipv46_address
+from django.http import JsonResponse, HttpRequest, HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
 from django.views import View
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 import json
-import kociemba
+import queue
 import time
-from typing import List, Dict, Tuple
+from typing import List, Dict, Literal, Optional, Tuple
 from pydantic import BaseModel, ValidationError, field_validator
-from .models import CubeSolve
+from .codecs import DecodeError, decode_request, encode_response, require_acceptable
+from .events import broadcaster
+from .models import CubeSolve, SolveJob
+from .pocket import facelets_to_corners
+from .profiling import profiler, summarize
+from .scramble import generate_scrambles
+from .solving import SolveFailed
+from . import solution_cache, solving
 
 # Pydantic Models
 
@@ -31,23 +45,71 @@ class CubeFace(BaseModel):
 
 class CubeRequestBody(BaseModel):
     cube: List[List[List[int]]]
+    mode: Literal["kociemba", "optimal", "cfop"] = "kociemba"
+    # Optional caps for mode="optimal", bounded by the server settings
+    max_nodes: Optional[int] = None
+    time_limit: Optional[float] = None
+
+    @field_validator("max_nodes", "time_limit")
+    def check_positive(cls, v):
+        # Zero would otherwise read as "no limit" to the solvers
+        if v is not None and v <= 0:
+            raise ValueError("Search caps must be positive")
+        return v
 
     @field_validator("cube")
     def check_cube_structure(cls, v):
         if not (isinstance(v, list) and len(v) == 6):
             raise ValueError("Cube must be a list of 6 faces")
+        # 3x3 cubes and 2x2 cubes are both accepted; all faces share one size
+        size = len(v[0]) if isinstance(v[0], list) else 0
         for face_data in v:
             if not (
-                isinstance(face_data, list)
-                and len(face_data) == 3
-                and all(isinstance(row, list) and len(row) == 3 for row in face_data)
+                size in (2, 3)
+                and isinstance(face_data, list)
+                and len(face_data) == size
+                and all(isinstance(row, list) and len(row) == size for row in face_data)
             ):
-                raise ValueError("Each face must be a 3x3 list of lists of integers")
+                raise ValueError(
+                    "Each face must be a 3x3 (or, for a 2x2 cube, 2x2) "
+                    "list of lists of integers"
+                )
             if not all(isinstance(item, int) for row in face_data for item in row):
                 raise ValueError("All elements in faces must be integers")
         return v
 
 
+class JobRequestBody(BaseModel):
+    cubes: List[List[List[List[int]]]]
+    mode: Literal["kociemba", "optimal", "cfop"] = "kociemba"
+
+    @field_validator("cubes")
+    def check_cubes(cls, v):
+        if not 1 <= len(v) <= settings.SOLVE_JOB_MAX_CUBES:
+            raise ValueError(
+                f"A job must have between 1 and {settings.SOLVE_JOB_MAX_CUBES} cubes"
+            )
+        for cube in v:
+            CubeRequestBody.check_cube_structure(cube)
+        return v
+
+
+class ProfilingRequestBody(BaseModel):
+    enabled: bool = True
+    # Path prefixes to profile; empty means every path
+    paths: List[str] = []
+    # Number of requests to profile; None keeps profiling until disabled
+    requests: Optional[int] = None
+    sample_rate: float = 1.0
+    memory: bool = False
+
+    @field_validator("sample_rate")
+    def check_sample_rate(cls, v):
+        if not 0.0 < v <= 1.0:
+            raise ValueError("sample_rate must be in (0, 1]")
+        return v
+
+
 def cube_array_to_facelet_string(cube_array: List[List[List[int]]]) -> str:
     """
     Convert 3D cube array to kociemba facelet string format.
@@ -83,9 +145,30 @@ def cube_array_to_facelet_string(cube_array: List[List[List[int]]]) -> str:
     return facelet_string
 
 
+def facelet_string_to_cube_array(facelet_string: str) -> List[List[List[int]]]:
+    """
+    Convert a kociemba facelet string back to the 3D cube array format.
+
+    This is the inverse of cube_array_to_facelet_string.
+    """
+    color_map: Dict[str, int] = {"U": 0, "R": 1, "F": 2, "D": 3, "L": 4, "B": 5}
+
+    cube_array: List[List[List[int]]] = []
+    for face_idx in range(6):
+        face = facelet_string[face_idx * 9 : face_idx * 9 + 9]
+        cube_array.append(
+            [
+                [color_map[cell] for cell in face[row * 3 : row * 3 + 3]]
+                for row in range(3)
+            ]
+        )
+
+    return cube_array
+
+
 def validate_cube_state(cube_array: List[List[List[int]]]) -> Tuple[bool, str]:
     """
-    Basic validation of cube state.
+    Basic validation of a 3x3 cube state.
     - Check dimensions (6 faces, each 3x3)
     - Check color counts (9 of each color)
     - Check center squares for consistency
@@ -131,7 +214,61 @@ def validate_cube_state(cube_array: List[List[List[int]]]) -> Tuple[bool, str]:
     return True, "Valid"
 
 
+def validate_2x2_cube_state(cube_array: List[List[List[int]]]) -> Tuple[bool, str]:
+    """
+    Validation of a 2x2 cube state.
+    - Check dimensions (6 faces, each 2x2)
+    - Check color counts (4 of each color)
+    - Check that the corners form a physically solvable cube
+
+    A 2x2 has no centers, so unlike validate_cube_state this checks the
+    corners themselves rather than leaving that to the solver.
+    """
+    if len(cube_array) != 6:
+        return False, "Cube must have exactly 6 faces"
+
+    color_counts: Dict[int, int] = {0: 0, 1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+
+    for i, face in enumerate(cube_array):
+        if len(face) != 2:
+            return False, f"Face {i} must have 2 rows"
+        for j, row in enumerate(face):
+            if len(row) != 2:
+                return False, f"Face {i}, row {j} must have 2 cells"
+            for cell in row:
+                if cell not in color_counts:
+                    return False, f"Invalid color value: {cell}. Must be 0-5"
+                color_counts[cell] += 1
+
+    # Each color should appear exactly 4 times
+    for color, count in color_counts.items():
+        if count != 4:
+            return False, f"Color {color} appears {count} times, should be 4"
+
+    try:
+        facelets_to_corners(cube_array_to_facelet_string(cube_array))
+    except ValueError as e:
+        return False, str(e)
+
+    return True, "Valid"
+
+
+def is_2x2(cube_array: List[List[List[int]]]) -> bool:
+    return len(cube_array[0]) == 2
+
+
+def get_client_ip(request: HttpRequest) -> str:
+    """Get client IP address from request."""
+    x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(",")[0]
+    else:
+        ip = request.META.get("REMOTE_ADDR")
+    return ip or "unknown"
+
+
 @method_decorator(csrf_exempt, name="dispatch")
+@method_decorator(require_acceptable, name="dispatch")
 class SolveCubeView(View):
     """
     Solve a Rubik's cube using Kociemba's algorithm.
@@ -158,44 +295,43 @@ class SolveCubeView(View):
 
     def _get_client_ip(self, request: HttpRequest) -> str:
         """Get client IP address from request."""
-        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(",")[0]
-        else:
-            ip = request.META.get("REMOTE_ADDR")
-        return ip or "unknown"
-
-    def post(self, request: HttpRequest) -> JsonResponse:
+        return get_client_ip(request)
+
+    def post(self, request: HttpRequest) -> HttpResponse:
         try:
             # Add debug logging
             print(f"Received request body: {request.body}")
             print(f"Request content type: {request.content_type}")
 
             try:
-                data = json.loads(request.body)
+                data = decode_request(request)
                 print(f"Parsed JSON data: {data}")
                 cube_data = CubeRequestBody(**data)
-            except json.JSONDecodeError as e:
-                print(f"JSON decode error: {e}")
-                return JsonResponse(
-                    {"error": "Invalid JSON in request body", "status": "error"},
-                    status=400,
+            except DecodeError as e:
+                print(f"Request decode error: {e}")
+                return encode_response(
+                    request,
+                    {"error": str(e), "status": "error"},
+                    status=e.status,
                 )
             except ValidationError as e:
                 print(f"Validation error: {e.errors()}")
-                return JsonResponse(
+                return encode_response(
+                    request,
                     {"error": f"Invalid request body: {e.errors()}", "status": "error"},
                     status=400,
                 )
             except Exception as e:
                 print(f"Unexpected error in data parsing: {e}")
-                return JsonResponse(
+                return encode_response(
+                    request,
                     {"error": f"Data parsing error: {str(e)}", "status": "error"},
                     status=500,
                 )
 
             if "cube" not in data:  # This check might be redundant with Pydantic
-                return JsonResponse(
+                return encode_response(
+                    request,
                     {"error": "Missing 'cube' in request body", "status": "error"},
                     status=400,
                 )
@@ -205,9 +341,13 @@ class SolveCubeView(View):
             # Validate cube state
             is_valid: bool
             message: str
-            is_valid, message = validate_cube_state(cube_array)
+            if is_2x2(cube_array):
+                is_valid, message = validate_2x2_cube_state(cube_array)
+            else:
+                is_valid, message = validate_cube_state(cube_array)
             if not is_valid:
-                return JsonResponse(
+                return encode_response(
+                    request,
                     {"error": f"Invalid cube state: {message}", "status": "error"},
                     status=400,
                 )
@@ -217,139 +357,107 @@ class SolveCubeView(View):
             print(f"Generated facelet string: {facelet_string}")
             print(f"Facelet string length: {len(facelet_string)}")
 
-            # Check if the cube is already solved
-            solved_facelet_string: str = (
-                "UUUUUUUUURRRRRRRRRFFFFFFFFFDDDDDDDDDLLLLLLLLLBBBBBBBBB"
-            )
-            if facelet_string == solved_facelet_string:
-                # Save solve record for already solved cube
-                try:
-                    client_ip = self._get_client_ip(request)
-                    CubeSolve.objects.create(
-                        facelet_string=facelet_string,
-                        solution="",  # Empty string for already solved
-                        move_count=0,
-                        solve_time_ms=0.0,
-                        ip_address=client_ip,
-                    )
-                except Exception as db_error:
-                    print(f"Failed to save solve record: {db_error}")
-
-                return JsonResponse(
-                    {
-                        "solution": [],
-                        "move_count": 0,
-                        "status": "success",
-                        "message": "Cube is already solved",
-                        "facelet_string": facelet_string,
-                    }
-                )
-
-            # Solve using kociemba
+            # Solve using kociemba, or the mode's solver (2x2 cubes are
+            # always solved optimally)
             try:
-                # Track solve time
-                solve_start = time.time()
-                solution_string: str = kociemba.solve(facelet_string)
-                solve_end = time.time()
-                solve_time_ms = (solve_end - solve_start) * 1000
-
-                if solution_string == "Error":
-                    return JsonResponse(
-                        {"error": "Cube state is unsolvable", "status": "error"},
-                        status=400,
-                    )
-
-                # Parse solution string into move list
-                moves: List[str] = solution_string.split() if solution_string else []
-
-                # Save solve record to database
-                try:
-                    # Get client IP address
-                    client_ip = self._get_client_ip(request)
-
-                    CubeSolve.objects.create(
-                        facelet_string=facelet_string,
-                        solution=solution_string,
-                        move_count=len(moves),
-                        solve_time_ms=solve_time_ms,
-                        ip_address=client_ip,
-                    )
-                except Exception as db_error:
-                    # Log the error but don't fail the request
-                    print(f"Failed to save solve record: {db_error}")
-
-                print(f"Cube solved in {solve_time_ms:.2f} ms with moves: {moves}")
-
-                return JsonResponse(
-                    {
-                        "solution": moves,
-                        "move_count": len(moves),
-                        "status": "success",
-                        "solve_time_ms": round(solve_time_ms, 2),
-                        "facelet_string": facelet_string,  # For debugging
-                    }
-                )
-
-            except ValueError as ve:
-                # This is likely from kociemba saying the cube string is invalid
-                print(f"Kociemba ValueError: {ve}")
-                return JsonResponse(
-                    {
-                        "error": "Invalid cube configuration - this cube state is not physically solvable",
-                        "details": str(ve),
-                        "facelet_string": facelet_string,
-                        "status": "error",
-                    },
-                    status=400,
+                solution = solving.solve(
+                    facelet_string,
+                    cube_data.mode,
+                    cube_data.max_nodes,
+                    cube_data.time_limit,
                 )
-
+            except SolveFailed as e:
+                error_data = {
+                    "error": str(e),
+                    "facelet_string": facelet_string,
+                    "status": "error",
+                }
+                if e.details:
+                    error_data["details"] = e.details
+                return encode_response(request, error_data, status=e.status)
             except Exception as e:
                 print(f"Solver exception: {e}")
                 import traceback
 
                 traceback.print_exc()
-                return JsonResponse(
-                    {"error": f"Solver error: {str(e)}", "status": "error"}, status=500
+                return encode_response(
+                    request,
+                    {"error": f"Solver error: {str(e)}", "status": "error"},
+                    status=500,
                 )
 
+            # Save solve record to database
+            try:
+                solving.record_solve(
+                    facelet_string, solution, self._get_client_ip(request)
+                )
+            except Exception as db_error:
+                # Log the error but don't fail the request
+                print(f"Failed to save solve record: {db_error}")
+
+            moves: List[str] = solution.moves
+            print(f"Cube solved in {solution.solve_time_ms:.2f} ms with moves: {moves}")
+
+            response_data = {
+                "solution": moves,
+                "move_count": len(moves),
+                "status": "success",
+                "solve_time_ms": round(solution.solve_time_ms, 2),
+                "facelet_string": facelet_string,  # For debugging
+                "mode": solution.mode,
+            }
+            if not moves:
+                response_data["message"] = "Cube is already solved"
+            if solution.stages is not None:
+                response_data["stages"] = solution.stages
+            return encode_response(request, response_data)
+
         except json.JSONDecodeError:
-            return JsonResponse(
-                {"error": "Invalid JSON in request body", "status": "error"}, status=400
+            return encode_response(
+                request,
+                {"error": "Invalid JSON in request body", "status": "error"},
+                status=400,
             )
         except Exception as e:
             print(f"Unexpected server error in SolveCubeView: {e}")
             import traceback
 
             traceback.print_exc()
-            return JsonResponse(
-                {"error": f"Server error: {str(e)}", "status": "error"}, status=500
+            return encode_response(
+                request,
+                {"error": f"Server error: {str(e)}", "status": "error"},
+                status=500,
             )
 
 
 @method_decorator(csrf_exempt, name="dispatch")
+@method_decorator(require_acceptable, name="dispatch")
 class ValidateCubeView(View):
     """
     Validate a cube state without solving it.
     """
 
-    def post(self, request: HttpRequest) -> JsonResponse:
+    def post(self, request: HttpRequest) -> HttpResponse:
         try:
             try:
-                data = json.loads(request.body)
+                data = decode_request(request)
                 cube_data = CubeRequestBody(**data)
-            except json.JSONDecodeError:
-                return JsonResponse(
-                    {"error": "Invalid JSON in request body", "status": "error"},
-                    status=400,
+            except DecodeError as e:
+                return encode_response(
+                    request,
+                    {"error": str(e), "status": "error"},
+                    status=e.status,
                 )
             except ValidationError as e:
-                return JsonResponse(
+                return encode_response(
+                    request,
                     {"error": f"Invalid request body: {e.errors()}", "status": "error"},
                     status=400,
                 )
 
             if "cube" not in data:  # This check might be redundant with Pydantic
-                return JsonResponse(
+                return encode_response(
+                    request,
                     {"error": "Missing 'cube' in request body", "status": "error"},
                     status=400,
                 )
@@ -357,30 +465,40 @@ class ValidateCubeView(View):
             cube_array: List[List[List[int]]] = cube_data.cube
             is_valid: bool
             message: str
-            is_valid, message = validate_cube_state(cube_array)
+            if is_2x2(cube_array):
+                is_valid, message = validate_2x2_cube_state(cube_array)
+            else:
+                is_valid, message = validate_cube_state(cube_array)
 
             if is_valid:
                 facelet_string: str = cube_array_to_facelet_string(cube_array)
-                return JsonResponse(
+                return encode_response(
+                    request,
                     {
                         "valid": True,
                         "message": message,
                         "facelet_string": facelet_string,
                         "status": "success",
-                    }
+                    },
                 )
             else:
-                return JsonResponse(
-                    {"valid": False, "message": message, "status": "error"}, status=400
+                return encode_response(
+                    request,
+                    {"valid": False, "message": message, "status": "error"},
+                    status=400,
                 )
 
         except json.JSONDecodeError:
-            return JsonResponse(
-                {"error": "Invalid JSON in request body", "status": "error"}, status=400
+            return encode_response(
+                request,
+                {"error": "Invalid JSON in request body", "status": "error"},
+                status=400,
             )
         except Exception as e:
-            return JsonResponse(
-                {"error": f"Server error: {str(e)}", "status": "error"}, status=500
+            return encode_response(
+                request,
+                {"error": f"Server error: {str(e)}", "status": "error"},
+                status=500,
             )
 
 
@@ -392,9 +510,64 @@ def health_check(request: HttpRequest) -> JsonResponse:
     )
 
 
+def parse_history_filters(params) -> Tuple[Optional[Dict[str, object]], str]:
+    """
+    Translate /history/ query parameters into CubeSolve lookups.
+
+    Supported parameters:
+    - ip: exact client IP address
+    - since / until: ISO 8601 date or datetime bounds on the solve timestamp
+      (since is inclusive, until is exclusive)
+    - min_moves / max_moves: inclusive bounds on the solution move count
+
+    Returns (filters, "Valid") or (None, error message).
+    """
+    filters: Dict[str, object] = {}
+
+    ip = params.get("ip")
+    if ip:
+        try:
+            validate_ipv46_address(ip)
+        except DjangoValidationError:
+            return None, f"Invalid ip parameter: {ip}"
+        filters["ip_address"] = ip
+
+    for name, lookup in (("since", "timestamp__gte"), ("until", "timestamp__lt")):
+        value = params.get(name)
+        if not value:
+            continue
+        try:
+            moment = parse_datetime(value)
+            if moment is None:
+                day = parse_date(value)
+                moment = datetime.combine(day, datetime.min.time()) if day else None
+        except ValueError:
+            moment = None
+        if moment is None:
+            return None, f"Invalid {name} parameter: {value}"
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment, dt_timezone.utc)
+        filters[lookup] = moment
+
+    for name, lookup in (
+        ("min_moves", "state__move_count__gte"),
+        ("max_moves", "state__move_count__lte"),
+    ):
+        value = params.get(name)
+        if not value:
+            continue
+        try:
+            filters[lookup] = int(value)
+        except ValueError:
+            return None, f"Invalid {name} parameter: {value}"
+
+    return filters, "Valid"
+
+
 @require_http_methods(["GET"])
-def solve_history(request: HttpRequest) -> JsonResponse:
-    """Get recent solve history."""
+@require_acceptable
+def solve_history(request: HttpRequest) -> HttpResponse:
+    """Get recent solve history, optionally filtered (see parse_history_filters)."""
     try:
         # Get query parameters for pagination
         limit = int(request.GET.get("limit", 50))  # Default to 50 records
@@ -403,42 +576,248 @@ def solve_history(request: HttpRequest) -> JsonResponse:
         # Limit the maximum number of records that can be retrieved at once
         limit = min(limit, 100)
 
+        filters, message = parse_history_filters(request.GET)
+        if filters is None:
+            return encode_response(
+                request, {"error": message, "status": "error"}, status=400
+            )
+
         # Query the database
-        solves = CubeSolve.objects.all()[offset : offset + limit]
+        matching = CubeSolve.objects.filter(**filters)
+        solves = matching.select_related("state")[offset : offset + limit]
 
         # Convert to JSON-serializable format
-        solve_data = []
-        for solve in solves:
-            solve_data.append(
-                {
-                    "id": solve.id,  # type: ignore
-                    "facelet_string": solve.facelet_string,
-                    "solution": solve.solution.split() if solve.solution else [],
-                    "move_count": solve.move_count,
-                    "solve_time_ms": solve.solve_time_ms,
-                    "timestamp": solve.timestamp.isoformat(),
-                    "ip_address": solve.ip_address,
-                }
-            )
+        solve_data = [solve.to_dict() for solve in solves]
 
         # Get total count for pagination
-        total_count = CubeSolve.objects.count()
+        total_count = matching.count()
 
-        return JsonResponse(
+        return encode_response(
+            request,
             {
                 "solves": solve_data,
                 "total_count": total_count,
                 "limit": limit,
                 "offset": offset,
                 "status": "success",
-            }
+            },
         )
 
     except ValueError:
-        return JsonResponse(
+        return encode_response(
+            request,
             {"error": "Invalid limit or offset parameter", "status": "error"},
             status=400,
         )
+    except Exception as e:
+        return encode_response(
+            request, {"error": f"Server error: {str(e)}", "status": "error"}, status=500
+        )
+
+
+def _sse_message(event_id: int, data: str) -> str:
+    return f"id: {event_id}\nevent: solve\ndata: {data}\n\n"
+
+
+@require_http_methods(["GET"])
+def history_stream(request: HttpRequest) -> StreamingHttpResponse | JsonResponse:
+    """
+    Server-Sent Events feed of new solves.
+
+    Clients resuming with a Last-Event-ID header (or ``last_event_id`` query
+    parameter) first receive the solves they missed.
+    """
+    try:
+        last_id = request.headers.get("Last-Event-ID") or request.GET.get(
+            "last_event_id"
+        )
+        cursor = int(last_id) if last_id else None
+    except ValueError:
+        return JsonResponse(
+            {"error": "Invalid Last-Event-ID", "status": "error"}, status=400
+        )
+
+    # Subscribing now lets the catch-up start before the first read
+    subscription = broadcaster.subscribe(cursor)
+
+    def stream():
+        try:
+            yield f"retry: {settings.HISTORY_STREAM_KEEPALIVE * 1000}\n\n"
+            started = time.monotonic()
+            # Streams end after a while so they never pin a server thread for
+            # good; EventSource reconnects and resumes via Last-Event-ID
+            while time.monotonic() - started < settings.HISTORY_STREAM_MAX_AGE:
+                try:
+                    event = subscription.get(timeout=settings.HISTORY_STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield _sse_message(*event)
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@require_http_methods(["GET"])
+def scramble(request: HttpRequest) -> JsonResponse:
+    """
+    Generate uniformly random cube states.
+
+    Query parameters:
+    - count: number of states (default 1, capped by SCRAMBLE_MAX_COUNT)
+    - sequence: "1" to include a scramble move sequence for each state
+    - seed: optional integer seed for reproducible output
+    """
+    try:
+        count = int(request.GET.get("count", 1))
+        with_sequences = request.GET.get("sequence", "0").lower() in ("1", "true")
+        seed = request.GET.get("seed")
+        seed = int(seed) if seed is not None else None
+
+        if count < 1:
+            raise ValueError("count must be positive")
+
+        max_count = (
+            settings.SCRAMBLE_MAX_SEQUENCES
+            if with_sequences
+            else settings.SCRAMBLE_MAX_COUNT
+        )
+        count = min(count, max_count)
+
+        scrambles = generate_scrambles(count, with_sequences=with_sequences, seed=seed)
+        for item in scrambles:
+            item["cube"] = facelet_string_to_cube_array(item["facelet_string"])
+
+        return JsonResponse(
+            {"scrambles": scrambles, "count": len(scrambles), "status": "success"}
+        )
+
+    except ValueError:
+        return JsonResponse(
+            {"error": "Invalid count or seed parameter", "status": "error"},
+            status=400,
+        )
+    except Exception as e:
+        return JsonResponse(
+            {"error": f"Server error: {str(e)}", "status": "error"}, status=500
+        )
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@require_acceptable
+def create_job(request: HttpRequest) -> HttpResponse:
+    """
+    Queue cubes to be solved in the background by ``manage.py solve_worker``.
+
+    Expected POST input: {"cubes": [cube, ...], "mode": "kociemba"}, each
+    cube in the /solve/ format. Returns the job id to poll at /jobs/<id>/.
+    """
+    try:
+        try:
+            body = JobRequestBody(**decode_request(request))
+        except DecodeError as e:
+            return encode_response(
+                request, {"error": str(e), "status": "error"}, status=e.status
+            )
+        except ValidationError as e:
+            return encode_response(
+                request,
+                {"error": f"Invalid request body: {e.errors()}", "status": "error"},
+                status=400,
+            )
+
+        facelet_strings: List[str] = []
+        for i, cube_array in enumerate(body.cubes):
+            if is_2x2(cube_array):
+                is_valid, message = validate_2x2_cube_state(cube_array)
+            else:
+                is_valid, message = validate_cube_state(cube_array)
+            if not is_valid:
+                return encode_response(
+                    request,
+                    {"error": f"Invalid cube {i}: {message}", "status": "error"},
+                    status=400,
+                )
+            facelet_strings.append(cube_array_to_facelet_string(cube_array))
+
+        client_ip = get_client_ip(request)
+        job = SolveJob.objects.create(
+            mode=body.mode,
+            facelet_strings=facelet_strings,
+            ip_address=client_ip if client_ip != "unknown" else None,
+            max_attempts=settings.SOLVE_JOB_MAX_ATTEMPTS,
+        )
+        return encode_response(
+            request,
+            {"job": job.to_dict(include_results=False), "status": "success"},
+            status=202,
+        )
+
+    except Exception as e:
+        return encode_response(
+            request, {"error": f"Server error: {str(e)}", "status": "error"}, status=500
+        )
+
+
+@require_http_methods(["GET"])
+@require_acceptable
+def job_detail(request: HttpRequest, job_id: int) -> HttpResponse:
+    """Progress of a solve job, with the results solved so far."""
+    job = SolveJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return encode_response(
+            request, {"error": "Job not found", "status": "error"}, status=404
+        )
+    return encode_response(request, {"job": job.to_dict(), "status": "success"})
+
+
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def profiling(request: HttpRequest) -> JsonResponse:
+    """
+    Staff-only switch for request profiling.
+
+    GET returns the current settings and a summary of saved profiles
+    (optionally only those whose path matches ?path=). POST takes a
+    ProfilingRequestBody to turn profiling on or off.
+    """
+    try:
+        if request.method == "POST":
+            try:
+                body = ProfilingRequestBody(**json.loads(request.body or b"{}"))
+            except json.JSONDecodeError:
+                return JsonResponse(
+                    {"error": "Invalid JSON in request body", "status": "error"},
+                    status=400,
+                )
+            except ValidationError as e:
+                return JsonResponse(
+                    {"error": f"Invalid request body: {e.errors()}", "status": "error"},
+                    status=400,
+                )
+            if body.enabled:
+                profiler.enable(
+                    body.paths, body.requests, body.sample_rate, body.memory
+                )
+            else:
+                profiler.disable()
+            return JsonResponse({"profiling": profiler.status(), "status": "success"})
+
+        return JsonResponse(
+            {
+                "profiling": profiler.status(),
+                "summary": summarize(request.GET.get("path", "")),
+                "status": "success",
+            }
+        )
+
     except Exception as e:
         return JsonResponse(
             {"error": f"Server error: {str(e)}", "status": "error"}, status=500
@@ -489,7 +868,7 @@ def solve_cube_fbv(request: HttpRequest) -> JsonResponse:
         try:
             # Track solve time
             solve_start = time.time()
-            solution_string: str = kociemba.solve(facelet_string)
+            solution_string: str = solution_cache.solve(facelet_string)
             solve_end = time.time()
             solve_time_ms = (solve_end - solve_start) * 1000
 
@@ -514,7 +893,7 @@ def solve_cube_fbv(request: HttpRequest) -> JsonResponse:
 
                 client_ip = get_client_ip(request)
 
-                CubeSolve.objects.create(
+                CubeSolve.objects.record(
                     facelet_string=facelet_string,
                     solution=solution_string,
                     move_count=len(moves),
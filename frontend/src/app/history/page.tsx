@@ -3,6 +3,7 @@
 import { useState, useEffect } from "react";
 import { ArrowLeft } from "lucide-react";
 import { useRouter } from "next/navigation";
+import { apiUrl } from "@/lib/api";
 
 interface SolveHistory {
   id: number;
@@ -23,7 +24,7 @@ export default function HistoryPage() {
   useEffect(() => {
     const fetchHistory = async () => {
       try {
-        const response = await fetch("http://localhost:8000/history");
+        const response = await fetch(apiUrl("/history/"));
         if (!response.ok) {
           throw new Error("Failed to fetch history");
         }
@@ -44,6 +45,20 @@ export default function HistoryPage() {
     };
 
     fetchHistory();
+
+    // Live updates: new solves are pushed by the server instead of polling.
+    // EventSource reconnects on its own and resumes via Last-Event-ID.
+    const stream = new EventSource(apiUrl("/history/stream/"));
+    stream.addEventListener("solve", (event) => {
+      const solve: SolveHistory = JSON.parse((event as MessageEvent).data);
+      setHistory((previous) =>
+        previous.some((item) => item.id === solve.id)
+          ? previous
+          : [solve, ...previous],
+      );
+    });
+
+    return () => stream.close();
   }, []);
 
   const formatTimestamp = (timestamp: string) => {
@@ -16,6 +16,7 @@ import {
   CubeColor,
   Axis,
 } from "@/types/rubik-s-cube";
+import { apiUrl } from "@/lib/api";
 
 interface SimpleRubiksCubeProps
   extends React.ComponentPropsWithoutRef<"group"> {
@@ -421,7 +422,7 @@ export const SimpleRubiksCube = forwardRef<
         );
       });
 
-      const response = await fetch("http://localhost:8000/solve/", {
+      const response = await fetch(apiUrl("/solve/"), {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -0,0 +1,9 @@
+// Base URL of the Django backend; set NEXT_PUBLIC_API_URL to point the
+// frontend at a backend other than the local development server.
+export const API_BASE_URL =
+  process.env.NEXT_PUBLIC_API_URL?.replace(/\/$/, "") ??
+  "http://localhost:8000";
+
+export function apiUrl(path: string): string {
+  return `${API_BASE_URL}${path}`;
+}